@@ -4,8 +4,16 @@ import requests
 import asyncio
 import json
 import hashlib
+import tempfile
+import zipfile
+import posixpath
+import mmap
+from contextlib import contextmanager
+from urllib.parse import unquote
 from ebooklib import epub
 from bs4 import BeautifulSoup
+from lxml import etree
+import lxml.html
 from deep_translator import GoogleTranslator
 from langdetect import detect
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
@@ -40,6 +48,7 @@ except ImportError as e:
 
 # Importar sistema de plugins
 from plugins import plugin_manager
+from plugins._http_pool import get_session
 
 # Cargar variables de entorno
 load_dotenv()
@@ -348,10 +357,12 @@ def traducir_texto_google(texto, source, target):
             else:
                 final_chunks.append(chunk)
 
+        # Un traductor por llamada (no por chunk); no se comparte entre hilos
+        translator = GoogleTranslator(source=source, target=target)
         traducciones = []
         for chunk in final_chunks:
             try:
-                trad = GoogleTranslator(source=source, target=target).translate(chunk)
+                trad = translator.translate(chunk)
                 traducciones.append(trad)
             except Exception as e:
                 logger.error(f"Error traduciendo chunk: {chunk[:50]}... {str(e)}")
@@ -457,12 +468,19 @@ def set_user_setting(usuario_id, setting, value):
     user_settings[usuario_id][setting] = value
     save_persistent_data()  # Guardar cambios persistentes
 
+def set_user_settings(cambios):
+    """Aplicar varios cambios (usuario_id, setting, valor) y guardar una sola vez"""
+    for usuario_id, setting, value in cambios:
+        user_settings.setdefault(usuario_id, {})[setting] = value
+    save_persistent_data()  # Una sola escritura para todo el lote
+
+# Comillas dobles, simples, y sus variantes tipográficas (compilado una sola vez)
+_QUOTES_RE = re.compile(r'[""''"''"“”‘’]')
+
 def reemplazar_comillas(texto):
     try:
         # Reemplazar diferentes tipos de comillas por guiones dobles (--)
-        import re
-        # Reemplazar comillas dobles, simples, y sus variantes tipográficas
-        texto = re.sub(r'[""''"''"“”‘’]', '―', texto)
+        texto = _QUOTES_RE.sub('―', texto)
         return texto
     except Exception as e:
         logger.error(f"Error reemplazando comillas: {str(e)}")
@@ -518,6 +536,82 @@ def procesar_txt(filename):
         logger.error(f"Error procesando TXT: {str(e)}")
         raise
 
+_CONTAINER_NS = {'c': 'urn:oasis:names:tc:opendocument:xmlns:container'}
+_OPF_NS = {'opf': 'http://www.idpf.org/2007/opf'}
+
+MMAP_THRESHOLD = 10 * 1024 * 1024  # EPUBs más grandes se leen mapeados en memoria
+
+class _ZipMmap(mmap.mmap):
+    """mmap utilizable como archivo por zipfile (antes de Python 3.13 no tiene seekable)"""
+    def seekable(self):
+        return True
+
+@contextmanager
+def abrir_epub(filename):
+    """Abrir un EPUB para zipfile/ebooklib: mapeado con mmap si es grande, por ruta si no"""
+    if os.path.getsize(filename) <= MMAP_THRESHOLD:
+        yield filename
+        return
+    with open(filename, 'rb') as f, _ZipMmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        yield mm
+
+def iter_epub_documentos(filename):
+    """Recorrer los documentos XHTML del EPUB en orden de lectura (spine), sin ebooklib"""
+    with abrir_epub(filename) as fuente, zipfile.ZipFile(fuente) as zf:
+        # container.xml indica dónde está el OPF; el OPF tiene el manifiesto y el spine
+        container = etree.fromstring(zf.read('META-INF/container.xml'))
+        opf_path = container.find('.//c:rootfile', _CONTAINER_NS).get('full-path')
+        opf = etree.fromstring(zf.read(opf_path))
+        base = posixpath.dirname(opf_path)
+
+        manifest = {item.get('id'): item for item in opf.iterfind('opf:manifest/opf:item', _OPF_NS)}
+        for itemref in opf.iterfind('opf:spine/opf:itemref', _OPF_NS):
+            # Las páginas fuera del flujo de lectura (linear="no") no son capítulos
+            if itemref.get('linear') == 'no':
+                continue
+            item = manifest.get(itemref.get('idref'))
+            if item is None or item.get('media-type') != 'application/xhtml+xml':
+                continue
+            # El índice (properties="nav") suele ir primero en el spine: no es texto del libro
+            if 'nav' in (item.get('properties') or '').split():
+                continue
+            href = posixpath.normpath(posixpath.join(base, unquote(item.get('href'))))
+            yield href, zf.read(href)
+
+def extraer_texto_html(contenido):
+    """Texto de un documento XHTML: un fragmento por línea, sin scripts ni estilos"""
+    if not contenido.strip():
+        return ""
+    doc = lxml.html.document_fromstring(contenido)
+    etree.strip_elements(doc, 'script', 'style', with_tail=False)
+    body = doc.find('body')
+    if body is None:
+        body = doc
+    return "\n".join(t for t in (s.strip() for s in body.itertext()) if t)
+
+def procesar_epub(filename):
+    """Extraer capítulos (nombre, texto) de un EPUB"""
+    capitulos = []
+    for href, contenido in iter_epub_documentos(filename):
+        texto = extraer_texto_html(contenido)
+        if texto:
+            capitulos.append(("Capítulo", texto))
+            logger.info(f"Capítulo extraído: {href}, longitud: {len(texto)}")
+
+    logger.info(f"Procesando EPUB: {filename}, capítulos: {len(capitulos)}")
+    return capitulos
+
+def extraer_capitulos(filename):
+    """Extraer capítulos de un archivo EPUB, PDF o TXT"""
+    nombre = filename.lower()
+    if nombre.endswith(".epub"):
+        return procesar_epub(filename)
+    elif nombre.endswith(".pdf"):
+        return [("Documento PDF", procesar_pdf(filename))]
+    elif nombre.endswith(".txt"):
+        return [("Documento TXT", procesar_txt(filename))]
+    return []
+
 # ----------------- Tareas Celery para procesamiento en background -----------------
 if celery_app:
     @celery_app.task
@@ -577,42 +671,11 @@ async def procesar_archivo(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # Procesar según tipo de archivo
     try:
-        if filename.lower().endswith(".epub"):
-            book = epub.read_epub(filename)
-            capitulos = []
-            items_html = list(book.get_items_of_type(epub.EpubHtml))
-            logger.info(f"Procesando EPUB: {filename}, items HTML: {len(items_html)}")
-
-            if not items_html:
-                # Intentar con todos los items de tipo 9 (XHTML)
-                all_items = list(book.get_items())
-                items_html = [item for item in all_items if item.get_type() == 9]
-                logger.info(f"Intentando con todos los items de tipo 9 (XHTML): {len(items_html)}")
-
-            for item in items_html:
-                contenido_html = item.get_content().decode("utf-8")
-                soup = BeautifulSoup(contenido_html, "html.parser")
-                # Extraer texto completo del HTML si no hay body, o del body
-                texto = soup.get_text(separator='\n').strip()
-                if not texto:
-                    body = soup.find("body")
-                    if body:
-                        texto = body.get_text(separator='\n').strip()
-                if texto:
-                    capitulos.append((item.title or "Capítulo", texto))
-                    logger.info(f"Capítulo extraído: {item.title or 'Capítulo'}, longitud: {len(texto)}")
-
-            if not capitulos:
-                logger.error("No se pudo extraer contenido del EPUB")
-                await msg.reply_text("❌ No se pudo extraer contenido del EPUB")
-                return
-
-        elif filename.lower().endswith(".pdf"):
-            texto_completo = procesar_pdf(filename)
-            capitulos = [("Documento PDF", texto_completo)]
-        elif filename.lower().endswith(".txt"):
-            texto_completo = procesar_txt(filename)
-            capitulos = [("Documento TXT", texto_completo)]
+        capitulos = extraer_capitulos(filename)
+        if not capitulos:
+            logger.error("No se pudo extraer contenido del archivo")
+            await msg.reply_text("❌ No se pudo extraer contenido del archivo")
+            return
     except Exception as e:
         logger.error(f"Error procesando archivo: {str(e)}")
         await msg.reply_text(f"❌ Error procesando el archivo: {str(e)}")
@@ -686,6 +749,8 @@ async def procesar_archivo(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info(f"{output_format.upper()} enviado al usuario")
 
 # ----------------- Procesar enlaces (Wattpad, Tumblr, Twitter) -----------------
+_TUMBLR_POST_RE = re.compile(r'tumblr\.com/post/(\d+)')
+
 async def procesar(update: Update, context: ContextTypes.DEFAULT_TYPE):
     msg = update.message
     text = msg.text.strip()
@@ -717,18 +782,32 @@ async def procesar_wattpad(msg, url, usuario_id):
     try:
         # Usar WattpadDownloader API (asumiendo que está corriendo en localhost:5042)
         WATTPAD_API_URL = os.environ.get("WATTPAD_API_URL", "http://localhost:5042/api/download")
-        response = requests.post(WATTPAD_API_URL, json={"url": url}, timeout=120)
-        response.raise_for_status()
-
-        epub_content = response.content
-        filename = "wattpad_book.epub"
-
-        # Enviar el EPUB al usuario
-        await msg.reply_document(
-            document=epub_content,
-            filename=filename,
-            caption="✅ ¡Libro de Wattpad descargado!"
-        )
+        os.makedirs('temp', exist_ok=True)
+        fd, epub_path = tempfile.mkstemp(suffix='.epub', dir='temp')
+        try:
+            # Descargar por bloques directamente al disco, sin tener el EPUB entero en memoria
+            with os.fdopen(fd, 'wb') as f, get_session().post(WATTPAD_API_URL, json={"url": url}, timeout=120, stream=True) as response:
+                response.raise_for_status()
+                chunks = response.iter_content(chunk_size=64 * 1024)
+                # Validar la cabecera ZIP (PK) con el primer bloque, antes de bajar el resto
+                primero = next(chunks, b'')
+                if not primero.startswith(b'PK'):
+                    raise ValueError("La API no devolvió un EPUB válido")
+                f.write(primero)
+                for chunk in chunks:
+                    f.write(chunk)
+
+            filename = "wattpad_book.epub"
+
+            # Enviar el EPUB al usuario
+            with open(epub_path, 'rb') as epub_file:
+                await msg.reply_document(
+                    document=epub_file,
+                    filename=filename,
+                    caption="✅ ¡Libro de Wattpad descargado!"
+                )
+        finally:
+            os.remove(epub_path)
 
         # Agregar al historial
         titulo = "Libro de Wattpad"
@@ -746,8 +825,7 @@ async def procesar_tumblr(msg, url, usuario_id):
 
     try:
         # Extraer información del URL
-        import re
-        match = re.search(r'tumblr\.com/post/(\d+)', url)
+        match = _TUMBLR_POST_RE.search(url)
         if not match:
             await msg.reply_text("❌ Enlace de Tumblr inválido.")
             return
@@ -760,7 +838,7 @@ async def procesar_tumblr(msg, url, usuario_id):
         if TUMBLR_API_KEY:
             # Usar API oficial
             api_url = f"https://api.tumblr.com/v2/blog/{blog_name}.tumblr.com/posts?api_key={TUMBLR_API_KEY}&id={post_id}"
-            response = requests.get(api_url)
+            response = get_session().get(api_url)
             response.raise_for_status()
             data = response.json()
 
@@ -778,7 +856,7 @@ async def procesar_tumblr(msg, url, usuario_id):
                 await msg.reply_text("❌ Post no encontrado.")
         else:
             # Fallback a scraping básico
-            response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'})
+            response = get_session().get(url, headers={'User-Agent': 'Mozilla/5.0'})
             response.raise_for_status()
             soup = BeautifulSoup(response.text, 'html.parser')
 
@@ -51,3 +51,26 @@ class PluginManager:
 
 # Instancia global del plugin manager
 plugin_manager = PluginManager()
+
+# Módulo principal del bot, importado una sola vez por los plugins
+_main = None
+
+def _get_main():
+    """Importar main la primera vez y reutilizar el módulo en las llamadas siguientes"""
+    global _main
+    if _main is None:
+        import main
+        _main = main
+    return _main
+
+def get_user_setting(user_id: int, setting: str, default=True):
+    """Leer una configuración de usuario del bot"""
+    return _get_main().get_user_setting(user_id, setting, default)
+
+def set_user_setting(user_id: int, setting: str, value):
+    """Guardar una configuración de usuario del bot"""
+    _get_main().set_user_setting(user_id, setting, value)
+
+def get_historial() -> Dict[Any, list]:
+    """Historial de traducciones del bot"""
+    return _get_main().historial
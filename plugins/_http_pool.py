@@ -0,0 +1,62 @@
+"""
+Sesión HTTP compartida con pool de conexiones y reintentos
+"""
+import logging
+import threading
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+POOL_MAXSIZE = 32
+IDLE_TIMEOUT = 60  # segundos sin uso antes de cerrar las conexiones
+
+_session: Optional[requests.Session] = None
+_last_used = 0.0
+_lock = threading.Lock()
+_timer: Optional[threading.Timer] = None
+
+def _build_session() -> requests.Session:
+    """Crear una sesión con keep-alive y reintentos con backoff"""
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=POOL_MAXSIZE, pool_maxsize=POOL_MAXSIZE,
+                          pool_block=False, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def get_session() -> requests.Session:
+    """Obtener la sesión HTTP compartida (se crea al primer uso)"""
+    global _session, _last_used
+    with _lock:
+        if _session is None:
+            _session = _build_session()
+            _schedule_idle_check()
+        _last_used = time.monotonic()
+        return _session
+
+def _schedule_idle_check():
+    """Programar la revisión de inactividad (llamar con _lock tomado)"""
+    global _timer
+    _timer = threading.Timer(IDLE_TIMEOUT, _close_if_idle)
+    _timer.daemon = True
+    _timer.start()
+
+def _close_if_idle():
+    """Cerrar las conexiones si la sesión no se usó en IDLE_TIMEOUT segundos"""
+    global _session, _timer
+    with _lock:
+        if _session is None:
+            return
+        if time.monotonic() - _last_used >= IDLE_TIMEOUT:
+            _session.close()
+            _session = None
+            _timer = None
+            logger.debug("Sesión HTTP inactiva cerrada")
+        else:
+            _schedule_idle_check()
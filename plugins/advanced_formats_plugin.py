@@ -5,6 +5,7 @@ import os
 import logging
 from typing import List, Tuple
 import subprocess
+from plugins import get_user_setting, set_user_setting
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +21,6 @@ class AdvancedFormatsPlugin:
     def on_post_translation(self, user_id: int, titulo: str, capitulos: List[Tuple[str, str]], formato: str):
         """Hook ejecutado después de una traducción completa"""
         try:
-            from main import get_user_setting
             extra_formats = get_user_setting(user_id, 'extra_formats', [])
 
             if 'mobi' in extra_formats:
@@ -114,7 +114,6 @@ class AdvancedFormatsPlugin:
     async def show_formats(self, update, context):
         """Mostrar formatos extra configurados"""
         user_id = update.message.from_user.id
-        from main import get_user_setting
 
         formats = get_user_setting(user_id, 'extra_formats', [])
         if formats:
@@ -125,7 +124,6 @@ class AdvancedFormatsPlugin:
     async def add_format(self, update, context):
         """Agregar formato extra"""
         user_id = update.message.from_user.id
-        from main import get_user_setting, set_user_setting
 
         if not context.args:
             await update.message.reply_text("Uso: /add_format <formato>\nFormatos disponibles: mobi, azw3, docx")
@@ -149,7 +147,6 @@ class AdvancedFormatsPlugin:
     async def remove_format(self, update, context):
         """Remover formato extra"""
         user_id = update.message.from_user.id
-        from main import get_user_setting, set_user_setting
 
         if not context.args:
             await update.message.reply_text("Uso: /remove_format <formato>")
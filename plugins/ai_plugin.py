@@ -6,6 +6,7 @@ import logging
 import openai
 import anthropic
 from typing import List, Tuple
+from plugins import get_user_setting, set_user_setting
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +35,6 @@ class AiPlugin:
     def on_pre_translation(self, user_id: int, text: str, source_lang: str, target_lang: str):
         """Hook ejecutado antes de la traducción"""
         try:
-            from main import get_user_setting
             if get_user_setting(user_id, 'ai_improve_translation', False):
                 logger.info(f"Mejorando traducción con IA para usuario {user_id}")
                 improved_text = self.improve_translation(text, source_lang, target_lang)
@@ -46,7 +46,6 @@ class AiPlugin:
     def on_post_translation(self, user_id: int, titulo: str, capitulos: List[Tuple[str, str]], formato: str):
         """Hook ejecutado después de la traducción"""
         try:
-            from main import get_user_setting
             if get_user_setting(user_id, 'ai_generate_summary', False):
                 logger.info(f"Generando resumen con IA para {titulo}")
                 summary = self.generate_summary(capitulos)
@@ -135,7 +134,6 @@ Resumen:"""
     async def toggle_ai_improve(self, update, context):
         """Activar/desactivar mejora de traducciones con IA"""
         user_id = update.message.from_user.id
-        from main import get_user_setting, set_user_setting
 
         current = get_user_setting(user_id, 'ai_improve_translation', False)
         new_value = not current
@@ -147,7 +145,6 @@ Resumen:"""
     async def toggle_ai_summary(self, update, context):
         """Activar/desactivar generación de resúmenes con IA"""
         user_id = update.message.from_user.id
-        from main import get_user_setting, set_user_setting
 
         current = get_user_setting(user_id, 'ai_generate_summary', False)
         new_value = not current
@@ -3,15 +3,22 @@ Plugin de integración con servicios cloud (Google Drive, Dropbox, etc.)
 """
 import os
 import logging
+import asyncio
 import dropbox
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import json
+from plugins import get_user_setting, set_user_setting
 
 logger = logging.getLogger(__name__)
 
+MB = 1 << 20
+
+# Tamaño de bloque para subidas por sesión a Dropbox (archivos grandes)
+DROPBOX_CHUNK_SIZE = 4 * MB
+
 class CloudPlugin:
     def __init__(self):
         self.name = "cloud"
@@ -21,6 +28,11 @@ class CloudPlugin:
         self.dropbox_client = None
         self.google_drive_service = None
 
+        # Subidas agrupadas por usuario y servicio (segundos de espera antes de subir el lote)
+        self.upload_bundle_delay = 5
+        self._pending_uploads: Dict[Tuple[int, str], List[str]] = {}
+        self._drive_folders: Dict[int, str] = {}
+
         # Configuración
         self.load_cloud_config()
 
@@ -37,16 +49,43 @@ class CloudPlugin:
     def on_translation_complete(self, user_id: int, titulo: str, capitulos: List, formato: str):
         """Hook ejecutado después de completar una traducción"""
         try:
-            from main import get_user_setting
             cloud_service = get_user_setting(user_id, 'cloud_service', None)
             if cloud_service:
                 # Subir archivo traducido automáticamente
                 output_file = f"{titulo.replace(' ', '_')}_traducido.{formato.lower()}"
                 if os.path.exists(output_file):
-                    asyncio.create_task(self.upload_to_cloud(user_id, output_file, cloud_service))
+                    self.queue_upload(user_id, output_file, cloud_service)
         except Exception as e:
             logger.error(f"Error en cloud upload: {e}")
 
+    def queue_upload(self, user_id: int, file_path: str, service: str):
+        """Agregar archivo al lote de subida pendiente del usuario para ese servicio"""
+        # Un lote por (usuario, servicio): si el usuario cambia de servicio durante
+        # la espera, los archivos nuevos no acaban en el servicio anterior
+        key = (user_id, service)
+        pending = self._pending_uploads.get(key)
+        if pending is None:
+            self._pending_uploads[key] = [file_path]
+            asyncio.create_task(self._bundle_upload(user_id, service))
+        elif file_path not in pending:
+            pending.append(file_path)
+
+    async def _bundle_upload(self, user_id: int, service: str):
+        """Subir juntos los archivos acumulados durante la espera"""
+        try:
+            await asyncio.sleep(self.upload_bundle_delay)
+            files = self._pending_uploads.pop((user_id, service), [])
+
+            if service == 'google_drive' and self.google_drive_service:
+                await self.upload_batch_to_google_drive(user_id, files)
+            else:
+                for file_path in files:
+                    await self.upload_to_cloud(user_id, file_path, service)
+
+        except Exception as e:
+            self._pending_uploads.pop((user_id, service), None)
+            logger.error(f"Error subiendo lote a {service}: {e}")
+
     def load_cloud_config(self):
         """Cargar configuración de servicios cloud"""
         try:
@@ -104,24 +143,70 @@ class CloudPlugin:
             file_name = os.path.basename(file_path)
             dropbox_path = f"/Traducciones/{user_id}/{file_name}"
 
-            with open(file_path, 'rb') as f:
-                self.dropbox_client.files_upload(f.read(), dropbox_path, mode=dropbox.files.WriteMode.overwrite)
+            # Lectura y subida bloqueantes: ejecutarlas fuera del event loop
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._dropbox_upload_file, file_path, dropbox_path)
 
             logger.info(f"Archivo subido a Dropbox: {dropbox_path}")
 
         except Exception as e:
             logger.error(f"Error subiendo a Dropbox: {e}")
 
+    def _dropbox_upload_file(self, file_path: str, dropbox_path: str):
+        """Subir archivo a Dropbox leyéndolo por bloques"""
+        file_size = os.path.getsize(file_path)
+        mode = dropbox.files.WriteMode.overwrite
+
+        with open(file_path, 'rb') as f:
+            if file_size <= DROPBOX_CHUNK_SIZE:
+                self.dropbox_client.files_upload(f.read(), dropbox_path, mode=mode)
+                return
+
+            # Archivos grandes: sesión de subida para no cargar todo en memoria
+            session = self.dropbox_client.files_upload_session_start(f.read(DROPBOX_CHUNK_SIZE))
+            cursor = dropbox.files.UploadSessionCursor(session_id=session.session_id, offset=f.tell())
+            commit = dropbox.files.CommitInfo(path=dropbox_path, mode=mode)
+
+            while file_size - f.tell() > DROPBOX_CHUNK_SIZE:
+                self.dropbox_client.files_upload_session_append_v2(f.read(DROPBOX_CHUNK_SIZE), cursor)
+                cursor.offset = f.tell()
+
+            self.dropbox_client.files_upload_session_finish(f.read(DROPBOX_CHUNK_SIZE), cursor, commit)
+
     async def upload_to_google_drive(self, user_id: int, file_path: str):
         """Subir archivo a Google Drive"""
+        await self.upload_batch_to_google_drive(user_id, [file_path])
+
+    async def upload_batch_to_google_drive(self, user_id: int, file_paths: List[str]):
+        """Subir varios archivos a Google Drive resolviendo la carpeta una sola vez"""
         try:
-            file_name = os.path.basename(file_path)
+            loop = asyncio.get_running_loop()
 
             # Crear carpeta si no existe
-            folder_id = await self.get_or_create_folder(user_id)
+            folder_id = await loop.run_in_executor(None, self.get_or_create_folder, user_id)
+            if not folder_id:
+                logger.error(f"Sin carpeta de Google Drive para {user_id}: lote no subido")
+                return
+
+            try:
+                file_ids = await loop.run_in_executor(None, self._drive_upload_files, file_paths, folder_id)
+            except Exception:
+                # La carpeta cacheada puede haberse borrado: volver a buscarla en la próxima subida
+                if self._drive_folders.get(user_id) == folder_id:
+                    del self._drive_folders[user_id]
+                raise
+
+            logger.info(f"Archivos subidos a Google Drive: {file_ids}")
+
+        except Exception as e:
+            logger.error(f"Error subiendo a Google Drive: {e}")
 
+    def _drive_upload_files(self, file_paths: List[str], folder_id: str) -> List[str]:
+        """Subir archivos a Google Drive (bloqueante)"""
+        file_ids = []
+        for file_path in file_paths:
             file_metadata = {
-                'name': file_name,
+                'name': os.path.basename(file_path),
                 'parents': [folder_id]
             }
 
@@ -129,21 +214,23 @@ class CloudPlugin:
             file = self.google_drive_service.files().create(
                 body=file_metadata, media_body=media, fields='id'
             ).execute()
+            file_ids.append(file.get('id'))
 
-            logger.info(f"Archivo subido a Google Drive: {file.get('id')}")
-
-        except Exception as e:
-            logger.error(f"Error subiendo a Google Drive: {e}")
+        return file_ids
 
     def get_or_create_folder(self, user_id: int) -> str:
         """Obtener o crear carpeta en Google Drive"""
         try:
+            if user_id in self._drive_folders:
+                return self._drive_folders[user_id]
+
             # Buscar carpeta existente
             query = f"name='Traducciones_{user_id}' and mimeType='application/vnd.google-apps.folder'"
             results = self.google_drive_service.files().list(q=query, fields="files(id, name)").execute()
             items = results.get('files', [])
 
             if items:
+                self._drive_folders[user_id] = items[0]['id']
                 return items[0]['id']
 
             # Crear nueva carpeta
@@ -156,6 +243,7 @@ class CloudPlugin:
                 body=folder_metadata, fields='id'
             ).execute()
 
+            self._drive_folders[user_id] = folder.get('id')
             return folder.get('id')
 
         except Exception as e:
@@ -210,10 +298,12 @@ class CloudPlugin:
         user_id = update.message.from_user.id
 
         if not context.args:
-            msg = "☁️ Servicios cloud disponibles:\n\n"
-            msg += "• dropbox - Dropbox\n"
-            msg += "• google_drive - Google Drive\n\n"
-            msg += "Uso: /cloud_setup <servicio>"
+            msg = (
+                "☁️ Servicios cloud disponibles:\n\n"
+                "• dropbox - Dropbox\n"
+                "• google_drive - Google Drive\n\n"
+                "Uso: /cloud_setup <servicio>"
+            )
             await update.message.reply_text(msg)
             return
 
@@ -224,14 +314,12 @@ class CloudPlugin:
             await update.message.reply_text(f"❌ Servicio '{service}' no disponible.")
             return
 
-        from main import set_user_setting
         set_user_setting(user_id, 'cloud_service', service)
         await update.message.reply_text(f"✅ Servicio cloud configurado: {service.title()}")
 
     async def upload_command(self, update, context):
         """Subir archivo actual a la nube"""
         user_id = update.message.from_user.id
-        from main import get_user_setting
 
         service = get_user_setting(user_id, 'cloud_service', None)
         if not service:
@@ -244,7 +332,6 @@ class CloudPlugin:
     async def list_cloud_files_command(self, update, context):
         """Listar archivos en la nube"""
         user_id = update.message.from_user.id
-        from main import get_user_setting
 
         service = get_user_setting(user_id, 'cloud_service', None)
         if not service:
@@ -256,12 +343,12 @@ class CloudPlugin:
         files = self.list_cloud_files(user_id, service)
 
         if files:
-            msg = f"☁️ Archivos en {service.title()}:\n\n"
-            for file in files[:10]:  # Máximo 10
-                size_mb = file['size'] / (1024 * 1024)
-                msg += f"📄 {file['name']}\n"
-                msg += f"   📏 {size_mb:.1f} MB\n"
-                msg += f"   📅 {file['modified'][:10]}\n\n"
+            parts = [f"☁️ Archivos en {service.title()}:\n\n"]
+            parts.extend(
+                f"📄 {file['name']}\n   📏 {file['size'] / MB:.1f} MB\n   📅 {file['modified'][:10]}\n\n"
+                for file in files[:10]  # Máximo 10
+            )
+            msg = "".join(parts)
         else:
             msg = f"☁️ No hay archivos en {service.title()}."
 
@@ -270,7 +357,6 @@ class CloudPlugin:
     async def toggle_auto_upload(self, update, context):
         """Activar/desactivar subida automática a la nube"""
         user_id = update.message.from_user.id
-        from main import get_user_setting, set_user_setting
 
         current = get_user_setting(user_id, 'auto_cloud_upload', False)
         new_value = not current
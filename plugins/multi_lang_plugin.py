@@ -4,6 +4,7 @@ Plugin para soporte de múltiples idiomas destino
 import os
 import logging
 from typing import List, Dict, Any
+from plugins import get_user_setting, set_user_setting
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +29,14 @@ class MultiLangPlugin:
             'hi': 'हिन्दी'
         }
 
+        # Precalcular códigos válidos y el listado de idiomas (no cambian en ejecución)
+        self._lang_codes = frozenset(self.supported_languages)
+        self._lang_list_md = (
+            "🌐 Idiomas disponibles:\n\n"
+            + "\n".join(f"`{code}` - {name}" for code, name in self.supported_languages.items())
+            + "\n\nUso: /add_lang <código_idioma>"
+        )
+
     def register_hooks(self, plugin_manager):
         """Registrar hooks para el sistema de plugins"""
         plugin_manager.register_hook('pre_translation', self.on_pre_translation)
@@ -36,7 +45,6 @@ class MultiLangPlugin:
     def on_pre_translation(self, user_id: int, text: str, source_lang: str, target_lang: str):
         """Hook ejecutado antes de la traducción"""
         try:
-            from main import get_user_setting
 
             # Verificar si el usuario tiene múltiples idiomas configurados
             multi_langs = get_user_setting(user_id, 'multi_languages', [])
@@ -103,20 +111,15 @@ class MultiLangPlugin:
     async def add_language(self, update, context):
         """Agregar idioma a la lista de traducciones múltiples"""
         user_id = update.message.from_user.id
-        from main import get_user_setting, set_user_setting
 
         if not context.args:
             # Mostrar lista de idiomas disponibles
-            langs_text = "🌐 Idiomas disponibles:\n\n"
-            for code, name in self.supported_languages.items():
-                langs_text += f"`{code}` - {name}\n"
-            langs_text += "\nUso: /add_lang <código_idioma>"
-            await update.message.reply_text(langs_text, parse_mode='Markdown')
+            await update.message.reply_text(self._lang_list_md, parse_mode='Markdown')
             return
 
         lang_code = context.args[0].lower()
 
-        if lang_code not in self.supported_languages:
+        if lang_code not in self._lang_codes:
             await update.message.reply_text(f"❌ Idioma '{lang_code}' no soportado.")
             return
 
@@ -131,7 +134,6 @@ class MultiLangPlugin:
     async def remove_language(self, update, context):
         """Remover idioma de la lista de traducciones múltiples"""
         user_id = update.message.from_user.id
-        from main import get_user_setting, set_user_setting
 
         if not context.args:
             await update.message.reply_text("Uso: /remove_lang <código_idioma>")
@@ -150,16 +152,17 @@ class MultiLangPlugin:
     async def list_languages(self, update, context):
         """Listar idiomas configurados para traducciones múltiples"""
         user_id = update.message.from_user.id
-        from main import get_user_setting
 
         multi_langs = get_user_setting(user_id, 'multi_languages', [])
 
         if multi_langs:
-            msg = "🌐 Idiomas configurados para traducción múltiple:\n\n"
-            for lang_code in multi_langs:
-                lang_name = self.supported_languages.get(lang_code, lang_code.upper())
-                msg += f"• {lang_name} ({lang_code})\n"
-            msg += f"\nTotal: {len(multi_langs)} idiomas"
+            parts = ["🌐 Idiomas configurados para traducción múltiple:\n\n"]
+            parts.extend(
+                f"• {self.supported_languages.get(lang_code, lang_code.upper())} ({lang_code})\n"
+                for lang_code in multi_langs
+            )
+            parts.append(f"\nTotal: {len(multi_langs)} idiomas")
+            msg = "".join(parts)
         else:
             msg = "🌐 No tienes idiomas configurados para traducción múltiple.\n\nUsa /add_lang <código> para agregar idiomas."
 
@@ -168,7 +171,6 @@ class MultiLangPlugin:
     async def clear_languages(self, update, context):
         """Limpiar todos los idiomas de traducción múltiple"""
         user_id = update.message.from_user.id
-        from main import set_user_setting
 
         set_user_setting(user_id, 'multi_languages', [])
         await update.message.reply_text("✅ Todos los idiomas de traducción múltiple han sido removidos.")
@@ -6,6 +6,7 @@ import logging
 import asyncio
 from typing import Dict, List
 import json
+from plugins import get_user_setting, set_user_setting
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +32,6 @@ class NotificationsPlugin:
     def on_translation_complete(self, user_id: int, titulo: str, capitulos: List, formato: str):
         """Hook ejecutado después de completar una traducción"""
         try:
-            from main import get_user_setting
             if get_user_setting(user_id, 'push_notifications', True):
                 message = f"✅ Tu traducción de '{titulo}' está lista en formato {formato.upper()}!"
                 self.send_notification(user_id, message, 'translation_complete')
@@ -108,7 +108,6 @@ class NotificationsPlugin:
     async def toggle_notifications(self, update, context):
         """Activar/desactivar notificaciones push"""
         user_id = update.message.from_user.id
-        from main import get_user_setting, set_user_setting
 
         current = get_user_setting(user_id, 'push_notifications', True)
         new_value = not current
@@ -3,10 +3,9 @@ Plugin completo de OCR para PDFs usando Tesseract y OpenCV
 """
 import os
 import logging
+import tempfile
 import cv2
 import pytesseract
-import numpy as np
-from PIL import Image
 from pdf2image import convert_from_path
 from typing import List, Tuple
 
@@ -41,24 +40,29 @@ class OcrPlugin:
     def extract_text_with_ocr(self, pdf_path: str) -> str:
         """Extraer texto de PDF usando OCR con preprocesamiento"""
         try:
-            # Convertir PDF a imágenes
-            images = convert_from_path(pdf_path, dpi=300)
-
             extracted_text = []
-            for i, image in enumerate(images):
-                logger.info(f"Procesando página {i+1}/{len(images)}")
 
-                # Convertir PIL a OpenCV
-                opencv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+            with tempfile.TemporaryDirectory(prefix='ocr_') as tmp_dir:
+                # Convertir PDF a imágenes PNG en disco (sin mantener páginas PIL en memoria)
+                page_paths = convert_from_path(
+                    pdf_path, dpi=300, output_folder=tmp_dir, fmt='png', paths_only=True
+                )
+
+                for i, page_path in enumerate(page_paths):
+                    logger.info(f"Procesando página {i+1}/{len(page_paths)}")
 
-                # Preprocesamiento de imagen
-                processed_image = self.preprocess_image(opencv_image)
+                    # Leer directamente en escala de grises
+                    image = cv2.imread(page_path, cv2.IMREAD_GRAYSCALE)
 
-                # Extraer texto con Tesseract
-                text = pytesseract.image_to_string(processed_image, lang='eng+spa')
+                    # Preprocesamiento de imagen
+                    processed_image = self.preprocess_image(image)
+                    cv2.imwrite(page_path, processed_image)
 
-                if text.strip():
-                    extracted_text.append(f"--- Página {i+1} ---\n{text.strip()}")
+                    # Tesseract lee el PNG desde la ruta, sin recodificar la imagen en Python
+                    text = pytesseract.image_to_string(page_path, lang='eng+spa')
+
+                    if text.strip():
+                        extracted_text.append(f"--- Página {i+1} ---\n{text.strip()}")
 
             return "\n\n".join(extracted_text)
 
@@ -69,22 +73,18 @@ class OcrPlugin:
     def preprocess_image(self, image):
         """Preprocesar imagen para mejorar OCR"""
         try:
-            # Convertir a escala de grises
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            # Convertir a escala de grises si la imagen viene en color
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
 
             # Aplicar filtro de desenfoque para reducir ruido
             blurred = cv2.GaussianBlur(gray, (5, 5), 0)
 
             # Aplicar threshold adaptativo
-            thresh = cv2.adaptiveThreshold(
+            # (Sin morfología: con un kernel 1x1 CLOSE/OPEN no modifican la imagen)
+            processed = cv2.adaptiveThreshold(
                 blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
             )
 
-            # Operaciones morfológicas para limpiar
-            kernel = np.ones((1, 1), np.uint8)
-            processed = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
-            processed = cv2.morphologyEx(processed, cv2.MORPH_OPEN, kernel)
-
             # Redimensionar si es necesario
             height, width = processed.shape
             if height < 300:
@@ -4,15 +4,53 @@ Plugin de sistema de colas para traducciones pesadas
 import os
 import logging
 import asyncio
-import json
+import orjson
+import sqlite3
+import heapq
+import itertools
+import time
+from collections import Counter, defaultdict, deque
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields, MISSING
 import uuid
 
+from plugins import _get_main
+
 logger = logging.getLogger(__name__)
 
-@dataclass
+QUEUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    file_path TEXT NOT NULL,
+    file_size INTEGER NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    completed_at REAL,
+    progress REAL NOT NULL DEFAULT 0,
+    result_path TEXT,
+    error_msg TEXT,
+    estimated_time INTEGER,
+    file_name TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, priority DESC, created_at);
+"""
+
+UPSERT_JOB = """
+INSERT OR REPLACE INTO jobs (
+    id, user_id, file_path, file_size, priority, status, created_at,
+    started_at, completed_at, progress, result_path, error_msg, estimated_time, file_name
+) VALUES (
+    :id, :user_id, :file_path, :file_size, :priority, :status, :created_at,
+    :started_at, :completed_at, :progress, :result_path, :error_msg, :estimated_time, :file_name
+)
+"""
+
+@dataclass(slots=True)
 class QueueItem:
     """Elemento de la cola de traducciones"""
     id: str
@@ -21,22 +59,96 @@ class QueueItem:
     file_size: int
     priority: int  # 1=low, 2=normal, 3=high, 4=urgent
     status: str  # 'queued', 'processing', 'completed', 'failed'
-    created_at: str
-    started_at: Optional[str] = None
-    completed_at: Optional[str] = None
+    created_at: float  # segundos POSIX
+    started_at: Optional[float] = None
+    completed_at: Optional[float] = None
     progress: float = 0.0
     result_path: Optional[str] = None
     error_msg: Optional[str] = None
     estimated_time: Optional[int] = None  # segundos
+    file_name: Optional[str] = None  # Nombre original del archivo (file_path suele ser temporal)
+
+# Campos de QueueItem, calculados una vez para serializar sin asdict()
+_QI_FIELDS = tuple(f.name for f in fields(QueueItem))
+_QI_DEFAULTS = {f.name: f.default for f in fields(QueueItem) if f.default is not MISSING}
+
+def _qi_to_dict(item: QueueItem) -> Dict[str, Any]:
+    """Convertir un QueueItem a dict (sin la copia recursiva de asdict)"""
+    return {name: getattr(item, name) for name in _QI_FIELDS}
+
+def _uuid7() -> str:
+    """Generar un UUID versión 7 (RFC 9562): ordenable por momento de creación"""
+    ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), 'big')  # 80 bits: 12 + 62 aleatorios (sobran 6)
+    value = ((ms & 0xFFFF_FFFF_FFFF) << 80
+             | 0x7 << 76
+             | (rand >> 68) << 64
+             | 0b10 << 62
+             | rand & ((1 << 62) - 1))
+    return str(uuid.UUID(int=value))
+
+_QI_TIME_FIELDS = ('created_at', 'started_at', 'completed_at')
+
+def _to_iso(t: Optional[float]) -> Optional[str]:
+    """Formatear un timestamp POSIX como ISO (solo al mostrarlo)"""
+    return datetime.fromtimestamp(t).isoformat() if t is not None else None
+
+def _to_ts(value) -> Optional[float]:
+    """Convertir un timestamp guardado (número o ISO del formato anterior) a float"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+def _qi_from_dict(data: Dict[str, Any]) -> QueueItem:
+    """Crear un QueueItem desde un registro guardado (sin pasar por __init__)"""
+    item = QueueItem.__new__(QueueItem)
+    for name in _QI_FIELDS:
+        setattr(item, name, data.get(name, _QI_DEFAULTS.get(name)))
+    for name in _QI_TIME_FIELDS:
+        setattr(item, name, _to_ts(getattr(item, name)))
+    return item
+
+def _qi_to_public(item: QueueItem) -> Dict[str, Any]:
+    """Convertir un QueueItem a dict con las fechas en ISO"""
+    data = _qi_to_dict(item)
+    for name in _QI_TIME_FIELDS:
+        data[name] = _to_iso(data[name])
+    return data
 
 class QueuePlugin:
     def __init__(self):
         self.name = "queue"
         self.description = "Sistema de colas para traducciones pesadas"
-        self.queue: List[QueueItem] = []
+        self.queue: Dict[str, QueueItem] = {}
+        # Heap de pendientes: (-prioridad, creado, id); el payload nunca se compara
+        self._pending: List[tuple] = []
+        # Conteos por estado (global y por usuario), actualizados en cada transición
+        self._status_counts: Counter = Counter()
+        self._user_status_counts: Dict[int, Counter] = defaultdict(Counter)
+        # Últimos elementos de cada usuario, para no recorrer toda la cola
+        self._by_user: Dict[int, deque] = defaultdict(lambda: deque(maxlen=64))
+        # Despierta al despachador cuando hay trabajo nuevo o se libera un slot
+        self._wake = asyncio.Event()
         self.processing_slots = 2  # Máximo de traducciones simultáneas
         self.currently_processing = 0
-        self.queue_file = 'storage/translation_queue.json'
+        self._pool: Optional[ThreadPoolExecutor] = None  # Trabajo bloqueante de traducción
+        self.queue_file = 'storage/translation_queue.json'  # Formato anterior, solo para migrar
+        self.db_path = 'storage/queue.db'
+        self._conn: Optional[sqlite3.Connection] = None  # Se abre al primer uso (_db)
+
+        # Guardado diferido: los cambios se agrupan y se escriben en un solo flush
+        self.flush_interval = 0.010  # segundos
+        self.flush_max_pending = 100  # cambios acumulados que fuerzan el flush
+        self._dirty: set = set()
+        self._pending_writes = 0
+        self._flush_task = None
+
+        # Progreso: actualizaciones más cercanas que esto no se guardan por separado
+        self.progress_debounce = 0.100  # segundos
+        self._last_progress: Dict[str, float] = {}
 
     def register_hooks(self, plugin_manager):
         """Registrar hooks para el sistema de plugins"""
@@ -47,6 +159,9 @@ class QueuePlugin:
     def on_system_startup(self):
         """Hook ejecutado al iniciar el sistema"""
         self.load_queue()
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.processing_slots,
+                                            thread_name_prefix="queue")
         asyncio.create_task(self.process_queue())
         logger.info("Sistema de colas iniciado")
 
@@ -62,12 +177,14 @@ class QueuePlugin:
         """Hook ejecutado después de completar una traducción"""
         # Liberar slot de procesamiento
         self.currently_processing = max(0, self.currently_processing - 1)
+        self._wake.set()
 
-    def add_to_queue(self, user_id: int, file_path: str, file_size: int, priority: int = 2) -> str:
+    def add_to_queue(self, user_id: int, file_path: str, file_size: int, priority: int = 2,
+                     file_name: Optional[str] = None) -> str:
         """Agregar elemento a la cola"""
         try:
-            item_id = str(uuid.uuid4())
-            created_at = datetime.now().isoformat()
+            item_id = _uuid7()
+            created_at = time.time()
 
             # Estimar tiempo basado en tamaño
             estimated_time = self.estimate_processing_time(file_size)
@@ -80,14 +197,16 @@ class QueuePlugin:
                 priority=priority,
                 status='queued',
                 created_at=created_at,
-                estimated_time=estimated_time
+                estimated_time=estimated_time,
+                file_name=file_name or os.path.basename(file_path)
             )
 
-            self.queue.append(item)
-            self.save_queue()
-
-            # Ordenar cola por prioridad y tiempo de creación
-            self.queue.sort(key=lambda x: (-x.priority, x.created_at))
+            self.queue[item_id] = item
+            self._count_item(item)
+            self._by_user[user_id].append(item)
+            self._push_pending(item)
+            self.save_queue(item)
+            self._wake.set()
 
             logger.info(f"Elemento agregado a cola: {item_id} (usuario {user_id})")
             return item_id
@@ -114,76 +233,133 @@ class QueuePlugin:
         while True:
             try:
                 # Procesar elementos si hay slots disponibles
-                while self.currently_processing < self.processing_slots and self.queue:
-                    # Encontrar siguiente elemento a procesar
-                    pending_items = [item for item in self.queue if item.status == 'queued']
-
-                    if not pending_items:
+                while self.currently_processing < self.processing_slots:
+                    # Siguiente elemento por prioridad y antigüedad
+                    item = self._pop_pending()
+                    if item is None:
                         break
 
-                    # Tomar el primero (ya ordenado por prioridad)
-                    item = pending_items[0]
-                    item.status = 'processing'
-                    item.started_at = datetime.now().isoformat()
+                    self._set_status(item, 'processing')
+                    item.started_at = time.time()
                     self.currently_processing += 1
 
-                    self.save_queue()
+                    self.save_queue(item)
 
                     # Procesar en background
                     asyncio.create_task(self.process_item(item))
 
-                await asyncio.sleep(5)  # Revisar cada 5 segundos
+                # Esperar a que se agregue un elemento o se libere un slot
+                await self._wake.wait()
+                self._wake.clear()
 
             except Exception as e:
                 logger.error(f"Error procesando cola: {e}")
                 await asyncio.sleep(10)
 
+    def _count_item(self, item: QueueItem, delta: int = 1):
+        """Sumar (o restar) un elemento a los conteos por estado"""
+        self._status_counts[item.status] += delta
+        self._user_status_counts[item.user_id][item.status] += delta
+
+    def _set_status(self, item: QueueItem, status: str):
+        """Cambiar el estado de un elemento manteniendo los conteos"""
+        self._count_item(item, -1)
+        item.status = status
+        self._count_item(item)
+
+    def _push_pending(self, item: QueueItem):
+        """Agregar elemento al heap de pendientes"""
+        heapq.heappush(self._pending, (-item.priority, item.created_at, item.id))
+
+    def _pop_pending(self) -> Optional[QueueItem]:
+        """Sacar el siguiente elemento en cola, descartando entradas canceladas"""
+        while self._pending:
+            item_id = heapq.heappop(self._pending)[-1]
+            item = self.queue.get(item_id)
+            if item is not None and item.status == 'queued':
+                return item
+        return None
+
     async def process_item(self, item: QueueItem):
         """Procesar un elemento de la cola"""
         try:
             logger.info(f"Procesando elemento de cola: {item.id}")
-
-            # Simular procesamiento (aquí iría la lógica real de traducción)
-            # En una implementación real, llamaríamos a las funciones de traducción
-
-            # Actualizar progreso
-            for progress in [0.2, 0.5, 0.8, 1.0]:
-                item.progress = progress
-                self.save_queue()
-                await asyncio.sleep(2)  # Simular tiempo de procesamiento
-
-            # Simular resultado
-            item.status = 'completed'
-            item.completed_at = datetime.now().isoformat()
-            item.result_path = f"processed_{item.file_path}"
+            main = _get_main()
+            loop = asyncio.get_running_loop()
+
+            # El trabajo bloqueante va al pool; el bucle de eventos solo coordina
+            capitulos = await loop.run_in_executor(self._pool, main.extraer_capitulos, item.file_path)
+            if not capitulos:
+                raise ValueError("No se pudo extraer contenido del archivo")
+
+            idioma = main.detectar_idioma_seguro(capitulos[0][1])
+            total = len(capitulos)
+            for idx, (nombre, contenido) in enumerate(capitulos):
+                if idioma != 'es':
+                    contenido = await loop.run_in_executor(
+                        self._pool, main.traducir_texto, contenido, idioma, 'es', item.user_id)
+                elif main.get_user_setting(item.user_id, 'reemplazar_comillas'):
+                    contenido = main.reemplazar_comillas(contenido)
+                capitulos[idx] = (nombre, contenido)
+
+                self.progress_callback(item.id, (idx + 1) / total)
+                await asyncio.sleep(0)  # Ceder el control entre capítulos
+
+            formato = main.get_user_setting(item.user_id, 'output_format', 'epub')
+            # Título del libro: nombre original sin extensión, no la ruta temporal
+            titulo = os.path.splitext(item.file_name or os.path.basename(item.file_path))[0]
+            item.result_path = await loop.run_in_executor(
+                self._pool, main.crear_archivo_salida, titulo, capitulos, formato)
+            self._set_status(item, 'completed')
+            item.completed_at = time.time()
 
             logger.info(f"Elemento procesado exitosamente: {item.id}")
 
         except Exception as e:
             logger.error(f"Error procesando elemento {item.id}: {e}")
-            item.status = 'failed'
+            self._set_status(item, 'failed')
             item.error_msg = str(e)
 
         finally:
-            self.save_queue()
+            # Estado final (completado/fallido): guardar de inmediato
+            self.save_queue(item, durable=True)
+            self._last_progress.pop(item.id, None)
             self.currently_processing = max(0, self.currently_processing - 1)
+            self._wake.set()
+
+    def progress_callback(self, item_id: str, progress: float):
+        """Actualizar el progreso de un elemento, agrupando actualizaciones seguidas"""
+        item = self.queue.get(item_id)
+        if item is None:
+            return
+        item.progress = progress
+
+        now = time.monotonic()
+        if now - self._last_progress.get(item_id, 0.0) < self.progress_debounce:
+            return  # El valor queda en memoria; se guarda con la próxima actualización
+        self._last_progress[item_id] = now
+        self.save_queue(item)
 
     def get_queue_status(self, user_id: int = None) -> Dict[str, Any]:
         """Obtener estado de la cola"""
         try:
             if user_id:
-                user_items = [item for item in self.queue if item.user_id == user_id]
+                user_items = self._by_user.get(user_id, ())
+                recent = list(itertools.islice(reversed(user_items), 10))
+                counts = self._user_status_counts.get(user_id, Counter())
             else:
-                user_items = self.queue
+                recent = list(itertools.islice(reversed(self.queue.values()), 10))
+                counts = self._status_counts
+            recent.reverse()
 
             return {
-                'total_queued': len([i for i in user_items if i.status == 'queued']),
-                'total_processing': len([i for i in user_items if i.status == 'processing']),
-                'total_completed': len([i for i in user_items if i.status == 'completed']),
-                'total_failed': len([i for i in user_items if i.status == 'failed']),
+                'total_queued': counts.get('queued', 0),
+                'total_processing': counts.get('processing', 0),
+                'total_completed': counts.get('completed', 0),
+                'total_failed': counts.get('failed', 0),
                 'processing_slots': self.processing_slots,
                 'currently_processing': self.currently_processing,
-                'items': [asdict(item) for item in user_items[-10:]]  # Últimos 10
+                'items': [_qi_to_public(item) for item in recent]  # Últimos 10
             }
 
         except Exception as e:
@@ -193,39 +369,105 @@ class QueuePlugin:
     def cancel_item(self, item_id: str, user_id: int) -> bool:
         """Cancelar elemento de la cola"""
         try:
-            for item in self.queue:
-                if item.id == item_id and item.user_id == user_id:
-                    if item.status == 'queued':
-                        item.status = 'cancelled'
-                        self.save_queue()
-                        logger.info(f"Elemento cancelado: {item_id}")
-                        return True
-                    elif item.status == 'processing':
-                        # No se puede cancelar si ya está procesando
-                        return False
+            item = self.queue.get(item_id)
+            if item and item.user_id == user_id and item.status == 'queued':
+                # La entrada del heap se descarta al sacarla
+                self._set_status(item, 'cancelled')
+                self.save_queue(item)
+                logger.info(f"Elemento cancelado: {item_id}")
+                return True
+            # No se puede cancelar si no existe o ya está procesando
             return False
 
         except Exception as e:
             logger.error(f"Error cancelando elemento: {e}")
             return False
 
+    def _db(self) -> sqlite3.Connection:
+        """Conexión a la base de datos de la cola, abierta al primer uso"""
+        if self._conn is None:
+            self._conn = self._open_db()
+        return self._conn
+
+    def _open_db(self) -> sqlite3.Connection:
+        """Abrir la base de datos de la cola en modo WAL"""
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-64000")
+        conn.executescript(QUEUE_SCHEMA)
+        # Bases creadas antes de guardar el nombre original del archivo
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if 'file_name' not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN file_name TEXT")
+        return conn
+
     def load_queue(self):
-        """Cargar cola desde archivo"""
+        """Cargar cola desde la base de datos"""
         try:
-            if os.path.exists(self.queue_file):
-                with open(self.queue_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.queue = [QueueItem(**item) for item in data]
-                logger.info(f"Cola cargada: {len(self.queue)} elementos")
+            rows = self._db().execute("SELECT * FROM jobs ORDER BY created_at").fetchall()
+            self.queue = {row['id']: _qi_from_dict(dict(row)) for row in rows}
+
+            # Migrar la cola del archivo JSON anterior si la base está vacía
+            if not self.queue and os.path.exists(self.queue_file):
+                with open(self.queue_file, 'rb') as f:
+                    data = orjson.loads(f.read())
+                self.queue = {item['id']: _qi_from_dict(item) for item in data}
+                self.save_queue(*self.queue.values(), durable=True)
+                logger.info(f"Cola migrada desde {self.queue_file}")
+
+            self._pending = []
+            self._status_counts.clear()
+            self._user_status_counts.clear()
+            self._by_user.clear()
+            for item in self.queue.values():
+                self._count_item(item)
+                self._by_user[item.user_id].append(item)
+                if item.status == 'queued':
+                    self._push_pending(item)
+            logger.info(f"Cola cargada: {len(self.queue)} elementos")
         except Exception as e:
             logger.error(f"Error cargando cola: {e}")
 
-    def save_queue(self):
-        """Guardar cola a archivo"""
+    def save_queue(self, *items: QueueItem, durable: bool = False):
+        """Marcar elementos como modificados y programar su guardado"""
+        self._dirty.update(item.id for item in items)
+        self._pending_writes += 1
+
+        if durable or self._pending_writes >= self.flush_max_pending:
+            self._flush_queue()
+            return
+
+        if self._flush_task is None:
+            try:
+                self._flush_task = asyncio.get_running_loop().create_task(self._delayed_flush())
+            except RuntimeError:
+                # Sin event loop en marcha: guardar directamente
+                self._flush_queue()
+
+    async def _delayed_flush(self):
+        """Esperar un momento para agrupar cambios y guardar una sola vez"""
+        try:
+            await asyncio.sleep(self.flush_interval)
+        finally:
+            self._flush_task = None
+            self._flush_queue()
+
+    def _flush_queue(self):
+        """Escribir en la base de datos solo las filas modificadas"""
+        if not self._dirty:
+            return
         try:
-            os.makedirs('storage', exist_ok=True)
-            with open(self.queue_file, 'w', encoding='utf-8') as f:
-                json.dump([asdict(item) for item in self.queue], f, indent=2, ensure_ascii=False)
+            rows = [_qi_to_dict(self.queue[item_id]) for item_id in self._dirty if item_id in self.queue]
+            conn = self._db()
+            with conn:
+                conn.executemany(UPSERT_JOB, rows)
+            self._dirty.clear()
+            self._pending_writes = 0
         except Exception as e:
             logger.error(f"Error guardando cola: {e}")
 
@@ -259,7 +501,7 @@ class QueuePlugin:
                     'failed': '❌'
                 }.get(item['status'], '❓')
 
-                msg += f"{status_emoji} {item['id'][:8]}... - {item['status']}\n"
+                msg += f"{status_emoji} ...{item['id'][-8:]} - {item['status']}\n"
 
         await update.message.reply_text(msg)
 
@@ -4,20 +4,31 @@ Plugin de sistema de recomendaciones basado en historial de traducciones
 import os
 import logging
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
 from typing import List, Dict, Tuple
-import json
+import orjson
+from plugins import get_historial
 
 logger = logging.getLogger(__name__)
 
+# Caracteres de cada libro que se usan para calcular similitudes
+BOOK_TEXT_LIMIT = 10000
+
 class RecommendationPlugin:
     def __init__(self):
         self.name = "recommendation"
         self.description = "Sistema de recomendaciones basado en historial de traducciones"
-        self.vectorizer = TfidfVectorizer(stop_words='english', max_features=1000)
+        # Vectorizador sin estado: agregar un libro no obliga a reajustar el vocabulario
+        self.vectorizer = HashingVectorizer(stop_words='english', n_features=2 ** 14,
+                                            alternate_sign=False, norm=None)
+        self.transformer = TfidfTransformer()
+        self.term_counts = None  # Conteos por libro (CSR), una fila por título
         self.tfidf_matrix = None
+        self._tfidf_stale = False
         self.book_titles = []
+        self._title_to_idx: Dict[str, int] = {}
         self.book_metadata = {}
 
     def register_hooks(self, plugin_manager):
@@ -42,24 +53,36 @@ class RecommendationPlugin:
     def update_book_database(self, titulo: str, capitulos: List[Tuple[str, str]]):
         """Actualizar la base de datos de libros para recomendaciones"""
         try:
-            # Extraer texto completo
-            full_text = ""
-            for cap_nombre, cap_texto in capitulos:
-                full_text += f"{cap_nombre} {cap_texto} "
-
             # Guardar metadata
-            if titulo not in self.book_titles:
+            if titulo not in self._title_to_idx:
+                # Texto de muestra: solo se unen capítulos hasta alcanzar el límite
+                parts, total = [], 0
+                for cap_nombre, cap_texto in capitulos:
+                    chunk = f"{cap_nombre} {cap_texto} "
+                    parts.append(chunk)
+                    total += len(chunk)
+                    if total >= BOOK_TEXT_LIMIT:
+                        break
+                sample_text = "".join(parts)[:BOOK_TEXT_LIMIT]
+
+                word_count = sum(len(cap_nombre.split()) + len(cap_texto.split())
+                                 for cap_nombre, cap_texto in capitulos)
+
+                self._title_to_idx[titulo] = len(self.book_titles)
                 self.book_titles.append(titulo)
                 self.book_metadata[titulo] = {
-                    'text': full_text[:10000],  # Limitar texto
+                    'text': sample_text,
                     'chapters': len(capitulos),
-                    'word_count': len(full_text.split())
+                    'word_count': word_count
                 }
 
-            # Regenerar matriz TF-IDF
-            if len(self.book_titles) > 1:
-                texts = [self.book_metadata[title]['text'] for title in self.book_titles]
-                self.tfidf_matrix = self.vectorizer.fit_transform(texts)
+                # Agregar solo la fila del libro nuevo; el TF-IDF se recalcula al consultar
+                row = self.vectorizer.transform([self.book_metadata[titulo]['text']])
+                if self.term_counts is None:
+                    self.term_counts = row
+                else:
+                    self.term_counts = sp.vstack([self.term_counts, row], format='csr')
+                self._tfidf_stale = True
 
             # Guardar en archivo
             self.save_database()
@@ -70,7 +93,7 @@ class RecommendationPlugin:
     def get_recommendations(self, user_id: int) -> List[str]:
         """Obtener recomendaciones para un usuario"""
         try:
-            from main import historial
+            historial = get_historial()
 
             if user_id not in historial or not historial[user_id]:
                 return ["Traduce algunos libros primero para obtener recomendaciones personalizadas."]
@@ -78,22 +101,35 @@ class RecommendationPlugin:
             # Obtener libros recientes del usuario
             user_books = [titulo for titulo, _ in historial[user_id]]
 
-            if not self.tfidf_matrix or len(self.book_titles) < 2:
+            self.refresh_tfidf()
+            if self.tfidf_matrix is None or self.tfidf_matrix.shape[0] < 2:
                 return ["Se necesitan más libros en la base de datos para generar recomendaciones."]
 
             recommendations = []
 
-            for user_book in user_books[-3:]:  # Últimos 3 libros
-                if user_book in self.book_titles:
-                    book_idx = self.book_titles.index(user_book)
-                    similarities = cosine_similarity(self.tfidf_matrix[book_idx], self.tfidf_matrix).flatten()
-
-                    # Obtener índices de libros más similares (excluyendo el mismo libro)
-                    similar_indices = similarities.argsort()[::-1][1:4]  # Top 3 similares
-
+            # Últimos 3 libros del usuario que están en la base de datos
+            book_indices = [self._title_to_idx[b] for b in user_books[-3:] if b in self._title_to_idx]
+            read_books = set(user_books)
+            recommended = set()
+
+            if book_indices:
+                # Las filas TF-IDF ya están normalizadas (L2): la similitud coseno
+                # de todos los libros consultados es un único producto de matrices
+                similarities = (self.tfidf_matrix[book_indices] @ self.tfidf_matrix.T).toarray()
+
+                # Excluir al propio libro y quedarse con los 3 más similares:
+                # selección O(N) y luego un orden de solo k elementos
+                similarities[np.arange(len(book_indices)), book_indices] = -np.inf
+                k = min(3, similarities.shape[1] - 1)
+                top_indices = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+                order = np.argsort(-np.take_along_axis(similarities, top_indices, axis=1), axis=1)
+                top_indices = np.take_along_axis(top_indices, order, axis=1)
+
+                for similar_indices in top_indices:
                     for idx in similar_indices:
                         similar_book = self.book_titles[idx]
-                        if similar_book not in user_books and similar_book not in recommendations:
+                        if similar_book not in read_books and similar_book not in recommended:
+                            recommended.add(similar_book)
                             recommendations.append(similar_book)
 
             if recommendations:
@@ -105,6 +141,12 @@ class RecommendationPlugin:
             logger.error(f"Error generando recomendaciones: {e}")
             return ["Error generando recomendaciones."]
 
+    def refresh_tfidf(self):
+        """Recalcular los pesos TF-IDF a partir de los conteos si hubo libros nuevos"""
+        if self._tfidf_stale and self.term_counts is not None:
+            self.tfidf_matrix = self.transformer.fit_transform(self.term_counts)
+            self._tfidf_stale = False
+
     def save_database(self):
         """Guardar base de datos de libros"""
         try:
@@ -113,8 +155,8 @@ class RecommendationPlugin:
                 'book_titles': self.book_titles,
                 'book_metadata': self.book_metadata
             }
-            with open('storage/book_database.json', 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with open('storage/book_database.json', 'wb') as f:
+                f.write(orjson.dumps(data))
         except Exception as e:
             logger.error(f"Error guardando base de datos: {e}")
 
@@ -122,15 +164,17 @@ class RecommendationPlugin:
         """Cargar base de datos de libros"""
         try:
             if os.path.exists('storage/book_database.json'):
-                with open('storage/book_database.json', 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                with open('storage/book_database.json', 'rb') as f:
+                    data = orjson.loads(f.read())
                     self.book_titles = data.get('book_titles', [])
                     self.book_metadata = data.get('book_metadata', {})
+                self._title_to_idx = {title: i for i, title in enumerate(self.book_titles)}
 
-                # Regenerar matriz TF-IDF si hay datos
+                # Vectorizar todos los libros en una sola pasada
                 if self.book_titles:
                     texts = [self.book_metadata[title]['text'] for title in self.book_titles]
-                    self.tfidf_matrix = self.vectorizer.fit_transform(texts)
+                    self.term_counts = self.vectorizer.transform(texts)
+                    self._tfidf_stale = True
 
                 logger.info(f"Base de datos cargada: {len(self.book_titles)} libros")
         except Exception as e:
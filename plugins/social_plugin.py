@@ -9,6 +9,7 @@ import discord
 from typing import List, Dict, Any, Optional
 import asyncio
 import json
+from plugins import get_user_setting, set_user_setting
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +22,9 @@ class SocialPlugin:
         self.twitter_api = None
         self.reddit_api = None
         self.discord_bot = None
+        self._any_api_enabled = False
+        # Límite de publicaciones simultáneas entre todas las traducciones
+        self._share_semaphore = asyncio.Semaphore(8)
 
         # Cargar configuración
         self.load_social_config()
@@ -38,7 +42,9 @@ class SocialPlugin:
     def on_translation_complete(self, user_id: int, titulo: str, capitulos: List, formato: str):
         """Hook ejecutado después de completar una traducción"""
         try:
-            from main import get_user_setting
+            # Sin redes configuradas no hay nada que compartir
+            if not self._any_api_enabled:
+                return
             if get_user_setting(user_id, 'social_sharing', False):
                 asyncio.create_task(self.share_translation(user_id, titulo, formato))
         except Exception as e:
@@ -105,44 +111,66 @@ class SocialPlugin:
                 self.discord_bot = discord.Client(intents=intents)
                 logger.info("Discord bot inicializado")
 
+            self._any_api_enabled = bool(self.twitter_api or self.reddit_api or self.discord_bot)
+
         except Exception as e:
             logger.error(f"Error inicializando APIs sociales: {e}")
 
     async def share_translation(self, user_id: int, titulo: str, formato: str):
         """Compartir traducción en redes sociales"""
+        if not self._any_api_enabled:
+            return
         try:
             message = f"📚 ¡Nueva traducción completada! '{titulo}' ahora disponible en {formato.upper()} #Traducción #BotTraductor"
 
-            # Compartir en Twitter
-            if self.twitter_api:
-                try:
-                    self.twitter_api.update_status(message)
-                    logger.info(f"Publicado en Twitter: {titulo}")
-                except Exception as e:
-                    logger.error(f"Error publicando en Twitter: {e}")
-
-            # Compartir en Reddit
-            if self.reddit_api:
-                try:
-                    subreddit = self.reddit_api.subreddit('translations')  # O el subreddit configurado
-                    subreddit.submit(title=f"Traducción: {titulo}", selftext=message)
-                    logger.info(f"Publicado en Reddit: {titulo}")
-                except Exception as e:
-                    logger.error(f"Error publicando en Reddit: {e}")
-
-            # Compartir en Discord
-            if self.discord_bot and self.social_config['discord'].get('channel_id'):
-                try:
-                    channel = self.discord_bot.get_channel(int(self.social_config['discord']['channel_id']))
-                    if channel:
-                        await channel.send(message)
-                        logger.info(f"Publicado en Discord: {titulo}")
-                except Exception as e:
-                    logger.error(f"Error publicando en Discord: {e}")
+            # Publicar en todas las redes a la vez; cada una registra su propio error
+            async with self._share_semaphore:
+                await asyncio.gather(
+                    self._share_twitter(titulo, message),
+                    self._share_reddit(titulo, message),
+                    self._share_discord(titulo, message),
+                    return_exceptions=True
+                )
 
         except Exception as e:
             logger.error(f"Error compartiendo traducción: {e}")
 
+    async def _share_twitter(self, titulo: str, message: str):
+        """Compartir en Twitter (cliente síncrono, se ejecuta en un hilo)"""
+        if not self.twitter_api:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.twitter_api.update_status, message)
+            logger.info(f"Publicado en Twitter: {titulo}")
+        except Exception as e:
+            logger.error(f"Error publicando en Twitter: {e}")
+
+    async def _share_reddit(self, titulo: str, message: str):
+        """Compartir en Reddit (cliente síncrono, se ejecuta en un hilo)"""
+        if not self.reddit_api:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+            subreddit = self.reddit_api.subreddit('translations')  # O el subreddit configurado
+            await loop.run_in_executor(
+                None, lambda: subreddit.submit(title=f"Traducción: {titulo}", selftext=message))
+            logger.info(f"Publicado en Reddit: {titulo}")
+        except Exception as e:
+            logger.error(f"Error publicando en Reddit: {e}")
+
+    async def _share_discord(self, titulo: str, message: str):
+        """Compartir en Discord"""
+        if not (self.discord_bot and self.social_config['discord'].get('channel_id')):
+            return
+        try:
+            channel = self.discord_bot.get_channel(int(self.social_config['discord']['channel_id']))
+            if channel:
+                await channel.send(message)
+                logger.info(f"Publicado en Discord: {titulo}")
+        except Exception as e:
+            logger.error(f"Error publicando en Discord: {e}")
+
     def get_social_stats(self) -> Dict[str, Any]:
         """Obtener estadísticas de redes sociales"""
         try:
@@ -171,7 +199,6 @@ class SocialPlugin:
     async def toggle_social_sharing(self, update, context):
         """Activar/desactivar compartir en redes sociales"""
         user_id = update.message.from_user.id
-        from main import get_user_setting, set_user_setting
 
         current = get_user_setting(user_id, 'social_sharing', False)
         new_value = not current
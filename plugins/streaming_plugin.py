@@ -2,8 +2,13 @@
 Plugin para optimización de memoria con procesamiento streaming
 """
 import os
+import io
 import logging
 import asyncio
+import threading
+import hashlib
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple, Iterator
 import gc
 
@@ -13,6 +18,24 @@ class StreamingPlugin:
     def __init__(self):
         self.name = "streaming"
         self.description = "Optimización de memoria para archivos grandes usando streaming"
+        # Chunks traducidos a la vez (las llamadas al traductor son HTTP bloqueante)
+        self.translate_concurrency = int(os.environ.get('STREAMING_CONCURRENCY', '8'))
+        # Capítulos traducidos en paralelo (cada uno con su propia ventana de chunks)
+        self.chapter_workers = int(os.environ.get('STREAMING_CHAPTER_WORKERS', '4'))
+        # Solo forzar gc.collect() con presión de memoria real (porcentaje del sistema)
+        self.gc_memory_threshold = 80.0
+        self.gc_check_every = 64  # chunks
+        # Documentos XHTML más pequeños que esto no se parsean ni traducen
+        self.min_document_bytes = 512
+        # Traductores reutilizados por hilo y par de idiomas; los hilos son los de un pool
+        # propio y persistente (el pool por defecto de asyncio.run muere con cada texto)
+        self._translators = threading.local()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        # Caché LRU de chunks ya traducidos (texto repetido: créditos, encabezados...)
+        self.chunk_cache_size = 4096
+        self._chunk_cache: OrderedDict = OrderedDict()
+        self._chunk_cache_lock = threading.Lock()
 
     def register_hooks(self, plugin_manager):
         """Registrar hooks para el sistema de plugins"""
@@ -35,35 +58,107 @@ class StreamingPlugin:
         return None
 
     def process_large_text_streaming(self, text: str, source_lang: str, target_lang: str) -> str:
-        """Procesar texto grande usando streaming para ahorrar memoria"""
+        """Procesar texto grande usando streaming (versión síncrona)"""
+        coro = self.process_large_text_streaming_async(text, source_lang, target_lang)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        # Llamado desde un bucle de eventos activo: usar un bucle propio en otro hilo
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coro).result()
+
+    def get_executor(self) -> ThreadPoolExecutor:
+        """Pool de hilos de traducción, creado al primer uso y compartido entre textos"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.translate_concurrency,
+                                                    thread_name_prefix="streaming")
+            return self._executor
+
+    async def process_large_text_streaming_async(self, text: str, source_lang: str, target_lang: str) -> str:
+        """Procesar texto grande usando streaming, traduciendo varios chunks a la vez"""
         try:
             # Dividir en chunks más pequeños para traducción
             chunk_size = 5000  # Caracteres por chunk
-            chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
-
-            translated_chunks = []
-            for i, chunk in enumerate(chunks):
-                logger.info(f"Procesando chunk {i+1}/{len(chunks)}")
-                translated_chunk = self.translate_chunk(chunk, source_lang, target_lang)
-                translated_chunks.append(translated_chunk)
-
-                # Liberar memoria
-                gc.collect()
-
-            return ''.join(translated_chunks)
+            output = io.StringIO()
+            loop = asyncio.get_running_loop()
+            executor = self.get_executor()
+
+            # Ventana de traducciones en curso: como máximo `translate_concurrency`
+            # chunks vivos a la vez, escritos en orden en cuanto terminan
+            in_flight = deque()
+            for i, chunk in enumerate(self.iter_chunks(text, chunk_size)):
+                logger.info(f"Procesando chunk {i+1}")
+                in_flight.append(loop.run_in_executor(
+                    executor, self.translate_chunk, chunk, source_lang, target_lang
+                ))
+                if len(in_flight) >= self.translate_concurrency:
+                    output.write(await in_flight.popleft())
+
+                # Los chunks se liberan por conteo de referencias; recolectar solo bajo presión
+                if (i + 1) % self.gc_check_every == 0 and self.get_memory_usage() > self.gc_memory_threshold:
+                    gc.collect()
+
+            while in_flight:
+                output.write(await in_flight.popleft())
+            return output.getvalue()
 
         except Exception as e:
             logger.error(f"Error en procesamiento streaming: {e}")
             # Fallback a traducción normal
             from main import traducir_texto
-            return traducir_texto(text, source_lang, target_lang)
+            return await asyncio.get_running_loop().run_in_executor(
+                self.get_executor(), traducir_texto, text, source_lang, target_lang)
+
+    @staticmethod
+    def iter_chunks(text: str, chunk_size: int) -> Iterator[str]:
+        """Generar chunks de hasta chunk_size cortando en párrafos o frases"""
+        start = 0
+        length = len(text)
+        while start < length:
+            end = start + chunk_size
+            if end >= length:
+                yield text[start:]
+                return
+            # Buscar hacia atrás (sin pasar el límite del traductor) un fin de
+            # párrafo, luego un fin de frase; si no hay, cortar en seco
+            floor = start + chunk_size // 2
+            cut = text.rfind('\n\n', floor, end)
+            if cut == -1:
+                cut = text.rfind('. ', floor, end)
+            end = cut + 2 if cut != -1 else end
+            yield text[start:end]
+            start = end
+
+    def get_translator(self, source_lang: str, target_lang: str):
+        """Obtener el GoogleTranslator de este hilo para el par de idiomas"""
+        # translate() modifica el estado de la instancia: una por hilo, no compartida
+        cache = getattr(self._translators, 'by_pair', None)
+        if cache is None:
+            cache = self._translators.by_pair = {}
+        translator = cache.get((source_lang, target_lang))
+        if translator is None:
+            from deep_translator import GoogleTranslator
+            translator = cache[(source_lang, target_lang)] = GoogleTranslator(source=source_lang, target=target_lang)
+        return translator
 
     def translate_chunk(self, chunk: str, source_lang: str, target_lang: str) -> str:
         """Traducir un chunk individual"""
+        key = (hashlib.blake2b(chunk.encode('utf-8'), digest_size=16).digest(), source_lang, target_lang)
+        with self._chunk_cache_lock:
+            cached = self._chunk_cache.get(key)
+            if cached is not None:
+                self._chunk_cache.move_to_end(key)
+                return cached
         try:
-            from deep_translator import GoogleTranslator
-            translator = GoogleTranslator(source=source_lang, target=target_lang)
-            return translator.translate(chunk)
+            translated = self.get_translator(source_lang, target_lang).translate(chunk)
+            # Los fallos no se guardan para reintentarlos la próxima vez
+            with self._chunk_cache_lock:
+                self._chunk_cache[key] = translated
+                if len(self._chunk_cache) > self.chunk_cache_size:
+                    self._chunk_cache.popitem(last=False)
+            return translated
         except Exception as e:
             logger.error(f"Error traduciendo chunk: {e}")
             return chunk  # Retornar original si falla
@@ -88,10 +183,13 @@ class StreamingPlugin:
     def process_epub_streaming(self, epub_path: str):
         """Procesar EPUB grande capítulo por capítulo"""
         try:
+            import ebooklib
             from ebooklib import epub
-            import tempfile
+            from main import abrir_epub
 
-            book = epub.read_epub(epub_path)
+            # Los EPUB grandes se leen mapeados en memoria, sin copias en buffers de lectura
+            with abrir_epub(epub_path) as fuente:
+                book = epub.read_epub(fuente)
 
             # Crear libro de salida
             output_book = epub.EpubBook()
@@ -99,41 +197,23 @@ class StreamingPlugin:
             output_book.set_title(book.get_metadata('DC', 'title')[0][0] + ' (Translated)')
             output_book.set_language('es')
 
-            items = []
+            documents = []
             spine = ['nav']
 
-            # Procesar cada elemento
+            # Una sola pasada: todo va al libro de salida; los no textuales
+            # (imágenes, CSS, etc.) se copian tal cual
             for item in book.get_items():
+                output_book.add_item(item)
                 if item.get_type() == ebooklib.ITEM_DOCUMENT:
-                    logger.info(f"Procesando capítulo: {item.get_name()}")
-
-                    # Extraer texto
-                    soup = BeautifulSoup(item.get_content(), 'html.parser')
-                    text_content = soup.get_text()
-
-                    # Traducir si hay texto significativo
-                    if len(text_content.strip()) > 100:
-                        translated_text = self.process_large_text_streaming(text_content, 'auto', 'es')
-
-                        # Reconstruir HTML con texto traducido
-                        # Esto es simplificado - en producción necesitarías preservar estructura HTML
-                        new_content = f"<html><body><h1>{item.get_name()}</h1><p>{translated_text.replace(chr(10), '</p><p>')}</p></body></html>"
-
-                        item.set_content(new_content.encode('utf-8'))
-
-                    items.append(item)
+                    documents.append(item)
                     spine.append(item.get_name())
 
-                else:
-                    # Copiar elementos no textuales (imágenes, CSS, etc.)
-                    items.append(item)
-
-            # Agregar items al libro
-            for item in items:
-                output_book.add_item(item)
+            # Los capítulos son independientes: traducir varios a la vez
+            with ThreadPoolExecutor(max_workers=self.chapter_workers) as executor:
+                list(executor.map(self.translate_document, documents))
 
             # Crear tabla de contenidos
-            output_book.toc = tuple(items)
+            output_book.toc = tuple(documents)
             output_book.add_item(epub.EpubNcx())
             output_book.add_item(epub.EpubNav())
             output_book.spine = spine
@@ -149,6 +229,30 @@ class StreamingPlugin:
             logger.error(f"Error procesando EPUB en streaming: {e}")
             return None
 
+    def translate_document(self, item):
+        """Traducir el texto de un capítulo del EPUB y reemplazar su contenido"""
+        import lxml.html
+
+        logger.info(f"Procesando capítulo: {item.get_name()}")
+
+        # Portadas, índices y páginas de navegación: no vale la pena parsearlas
+        raw = item.get_content()
+        if len(raw) < self.min_document_bytes or b'<body' not in raw:
+            return
+
+        # Extraer texto (solo lectura: lxml directo, sin árbol de BeautifulSoup)
+        text_content = lxml.html.fromstring(raw).text_content()
+
+        # Traducir si hay texto significativo
+        if len(text_content.strip()) > 100:
+            translated_text = self.process_large_text_streaming(text_content, 'auto', 'es')
+
+            # Reconstruir HTML con texto traducido
+            # Esto es simplificado - en producción necesitarías preservar estructura HTML
+            new_content = f"<html><body><h1>{item.get_name()}</h1><p>{translated_text.replace(chr(10), '</p><p>')}</p></body></html>"
+
+            item.set_content(new_content.encode('utf-8'))
+
     def get_memory_usage(self) -> float:
         """Obtener uso de memoria actual"""
         try:
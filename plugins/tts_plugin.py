@@ -4,10 +4,37 @@ Plugin de Text-to-Speech para convertir traducciones a audio
 import os
 import logging
 from gtts import gTTS
-from typing import List, Tuple
+from typing import List, Tuple, Iterator
+from plugins import get_user_setting, set_user_setting
 
 logger = logging.getLogger(__name__)
 
+TTS_CHUNK_SIZE = 4500  # Caracteres por petición a gTTS
+
+def iter_tts_chunks(text: str, chunk_size: int = TTS_CHUNK_SIZE) -> Iterator[str]:
+    """Agrupar párrafos en bloques de hasta chunk_size caracteres"""
+    parts = []
+    size = 0
+    for par in text.split('\n'):
+        par = par.strip()
+        if not par:
+            continue
+        # Párrafos más largos que el bloque se cortan en seco
+        while len(par) > chunk_size:
+            if parts:
+                yield '\n'.join(parts)
+                parts, size = [], 0
+            yield par[:chunk_size]
+            par = par[chunk_size:]
+        # size ya incluye el salto de línea que separaría este párrafo del anterior
+        if parts and size + len(par) > chunk_size:
+            yield '\n'.join(parts)
+            parts, size = [], 0
+        parts.append(par)
+        size += len(par) + 1
+    if parts:
+        yield '\n'.join(parts)
+
 class TtsPlugin:
     def __init__(self):
         self.name = "tts"
@@ -22,25 +49,21 @@ class TtsPlugin:
         """Hook ejecutado después de una traducción completa"""
         try:
             # Verificar si el usuario tiene TTS activado
-            from main import get_user_setting
             if not get_user_setting(user_id, 'tts_enabled', False):
                 return
 
             logger.info(f"Generando audio TTS para {titulo} (usuario {user_id})")
 
             # Combinar todo el texto
-            full_text = ""
-            for cap_nombre, cap_texto in capitulos:
-                full_text += f"{cap_nombre}\n\n{cap_texto}\n\n"
-
-            # Generar audio
-            tts = gTTS(text=full_text[:5000], lang='es', slow=False)  # Limitar a 5000 chars
+            full_text = "".join(f"{cap_nombre}\n\n{cap_texto}\n\n" for cap_nombre, cap_texto in capitulos)
 
-            # Guardar archivo
+            # Generar el audio por bloques de párrafos; los frames MP3 se concatenan sin más
             audio_filename = f"{titulo.replace(' ', '_')}_tts.mp3"
             audio_path = os.path.join('temp', audio_filename)
             os.makedirs('temp', exist_ok=True)
-            tts.save(audio_path)
+            with open(audio_path, 'wb') as audio_file:
+                for chunk in iter_tts_chunks(full_text):
+                    gTTS(text=chunk, lang='es', slow=False).write_to_fp(audio_file)
 
             logger.info(f"Audio TTS generado: {audio_path}")
 
@@ -65,7 +88,6 @@ class TtsPlugin:
     async def toggle_tts(self, update, context):
         """Comando para activar/desactivar TTS"""
         user_id = update.message.from_user.id
-        from main import get_user_setting, set_user_setting
 
         current = get_user_setting(user_id, 'tts_enabled', False)
         new_value = not current
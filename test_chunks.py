@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from plugins.streaming_plugin import StreamingPlugin
+
+iter_chunks = StreamingPlugin.iter_chunks
+
+# ----------------- Streaming -----------------
+def test_chunks_texto_exacto_al_limite():
+    texto = "a" * 100
+    assert list(iter_chunks(texto, 100)) == [texto]
+    assert list(iter_chunks(texto + "b", 100)) == [texto, "b"]
+    assert list(iter_chunks("", 100)) == []
+
+def test_chunks_corta_en_parrafo_y_frase():
+    parrafo = "x" * 60 + "\n\n"
+    chunks = list(iter_chunks(parrafo + "y" * 60, 100))
+    assert chunks == [parrafo, "y" * 60]
+
+    frase = "x" * 60 + ". "
+    chunks = list(iter_chunks(frase + "y" * 60, 100))
+    assert chunks == [frase, "y" * 60]
+
+def test_chunks_respetan_limite_y_reconstruyen_texto():
+    texto = ("Una frase corta. " * 40 + "\n\n") * 30
+    for size in (50, 99, 100, 4999):
+        chunks = list(iter_chunks(texto, size))
+        assert "".join(chunks) == texto
+        assert all(len(chunk) <= size for chunk in chunks)
+
+# ----------------- TTS -----------------
+def test_tts_chunks_limite_exacto():
+    iter_tts_chunks = pytest.importorskip("plugins.tts_plugin").iter_tts_chunks
+    # "aaaa\nbbbbb" mide exactamente 10: cabe en un solo bloque
+    assert list(iter_tts_chunks("aaaa\nbbbbb", 10)) == ["aaaa\nbbbbb"]
+    assert list(iter_tts_chunks("aaaa\nbbbbbb", 10)) == ["aaaa", "bbbbbb"]
+    # Párrafo más largo que el bloque: corte en seco
+    assert list(iter_tts_chunks("c" * 25, 10)) == ["c" * 10, "c" * 10, "c" * 5]
+    assert list(iter_tts_chunks("\n  \n", 10)) == []
+
+def test_tts_chunks_respetan_limite():
+    iter_tts_chunks = pytest.importorskip("plugins.tts_plugin").iter_tts_chunks
+    texto = "\n".join("p" * (i % 37 + 1) for i in range(300))
+    for size in (10, 40, 100):
+        chunks = list(iter_tts_chunks(texto, size))
+        assert all(len(chunk) <= size for chunk in chunks)
+        if size >= 37:  # Sin párrafos cortados en seco: se recuperan tal cual
+            assert "\n".join(chunks) == texto
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -1,20 +1,23 @@
 import os
 import re
+import zipfile
 from ebooklib import epub
 from bs4 import BeautifulSoup
 from deep_translator import GoogleTranslator
-from langdetect import detect
+from langdetect import detect, DetectorFactory
 import logging
 
+from main import iter_epub_documentos, extraer_texto_html, procesar_epub
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Comillas dobles, simples, y sus variantes tipográficas (compilado una sola vez)
+_QUOTES_RE = re.compile(r'[""''"''"“”‘’]')
+
 def reemplazar_comillas(texto):
     # Reemplazar diferentes tipos de comillas por guiones dobles (--)
-    import re
-    # Reemplazar comillas dobles, simples, y sus variantes tipográficas
-    texto = re.sub(r'[""''"''"“”‘’]', '--', texto)
-    return texto
+    return _QUOTES_RE.sub('--', texto)
 
 # ----------------- Funciones auxiliares -----------------
 def crear_epub(titulo, capitulos):
@@ -47,49 +50,14 @@ def crear_epub(titulo, capitulos):
 def procesar_epub_local(filename):
     logger.info(f"Procesando EPUB local: {filename}")
 
-    # Leer EPUB
-    book = epub.read_epub(filename)
+    # Leer solo el texto: ZIP + OPF con lxml, sin cargar el libro completo con ebooklib
     capitulos = []
-    items_list = list(book.get_items_of_type(epub.EpubHtml))
-    logger.info(f"Procesando EPUB: {filename}, items HTML: {len(items_list)}")
-
-    # También intentar con otros tipos de items
-    all_items = list(book.get_items())
-    logger.info(f"Total items en el EPUB: {len(all_items)}")
-    for item in all_items:
-        logger.info(f"Item: {item.file_name}, type: {item.get_type()}")
-
-    for item in items_list:
-        contenido_html = item.get_content().decode("utf-8")
-        soup = BeautifulSoup(contenido_html, "html.parser")
-        # Extraer texto completo del HTML si no hay body, o del body
-        texto = soup.get_text(separator='\n').strip()
-        if not texto:
-            body = soup.find("body")
-            if body:
-                texto = body.get_text(separator='\n').strip()
+    for href, contenido in iter_epub_documentos(filename):
+        logger.info(f"Item: {href}")
+        texto = extraer_texto_html(contenido)
         if texto:
-            capitulos.append((item.title or "Capítulo", texto))
-            logger.info(f"Capítulo extraído: {item.title or 'Capítulo'}, longitud: {len(texto)}")
-
-    # Si no hay items HTML, intentar con todos los items de tipo 9 (que parecen ser XHTML)
-    if not capitulos:
-        logger.info("Intentando con todos los items de tipo 9 (XHTML)")
-        for item in all_items:
-            if item.get_type() == 9:  # Tipo XHTML
-                try:
-                    contenido_html = item.get_content().decode("utf-8")
-                    soup = BeautifulSoup(contenido_html, "html.parser")
-                    texto = soup.get_text(separator='\n').strip()
-                    if not texto:
-                        body = soup.find("body")
-                        if body:
-                            texto = body.get_text(separator='\n').strip()
-                    if texto:
-                        capitulos.append((item.file_name or "Capítulo", texto))
-                        logger.info(f"Capítulo extraído de {item.file_name}: longitud: {len(texto)}")
-                except Exception as e:
-                    logger.error(f"Error procesando {item.file_name}: {e}")
+            capitulos.append(("Capítulo", texto))
+            logger.info(f"Capítulo extraído de {href}: longitud: {len(texto)}")
 
     if not capitulos:
         logger.error("No se pudo extraer contenido del EPUB")
@@ -104,9 +72,10 @@ def procesar_epub_local(filename):
     if idioma_original != "es":
         total = len(capitulos)
         logger.info(f"Iniciando traducción de {total} capítulos")
+        translator = GoogleTranslator(source=idioma_original, target="es")
         for idx, (nombre, contenido) in enumerate(capitulos):
             try:
-                contenido_trad = GoogleTranslator(source=idioma_original, target="es").translate(contenido)
+                contenido_trad = translator.translate(contenido)
                 capitulos[idx] = (nombre, contenido_trad)
                 logger.info(f"Capítulo {idx+1} traducido")
             except Exception as e:
@@ -122,6 +91,55 @@ def procesar_epub_local(filename):
     logger.info(f"EPUB generado: {epub_file}")
     return epub_file
 
+# ----------------- Tests -----------------
+DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _capitulos_ebooklib(filename):
+    """Extracción de referencia con ebooklib: documentos XHTML del libro, sin el índice (nav)"""
+    book = epub.read_epub(filename)
+    capitulos = []
+    for item in book.get_items():
+        if item.get_type() == 9 and not isinstance(item, epub.EpubNav):
+            soup = BeautifulSoup(item.get_content().decode("utf-8"), "html.parser")
+            texto = "\n".join(soup.stripped_strings)
+            if texto:
+                capitulos.append(texto)
+    return capitulos
+
+def test_orden_capitulos_e_idioma():
+    """El índice no debe quedar como primer capítulo ni cambiar el idioma detectado"""
+    DetectorFactory.seed = 0
+    for nombre in ("Historia de Wattpad.epub",
+                   "Barrento,_Pedro_The_Prince_and_the_Singularity_A_Circular_Tale_2.epub",
+                   "Chloe_Slate_Snowed_In_2024,_Sapphic_Exploration_libgen_li.epub"):
+        filename = os.path.join(DIR, nombre)
+        esperado = _capitulos_ebooklib(filename)
+        obtenido = [texto for _, texto in procesar_epub(filename)]
+        assert obtenido == esperado, nombre
+        assert detect(obtenido[0]) == detect(esperado[0]), nombre
+
+def test_spine_omite_nav_y_no_lineales(tmp_path):
+    """Los itemref con linear="no" y el documento nav no se extraen como capítulos"""
+    filename = tmp_path / "libro.epub"
+    with zipfile.ZipFile(filename, "w") as zf:
+        zf.writestr("META-INF/container.xml",
+                    '<container xmlns="urn:oasis:names:tc:opendocument:xmlns:container"><rootfiles>'
+                    '<rootfile full-path="OEBPS/content.opf"/></rootfiles></container>')
+        zf.writestr("OEBPS/content.opf",
+                    '<package xmlns="http://www.idpf.org/2007/opf"><manifest>'
+                    '<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>'
+                    '<item id="cub" href="cubierta.xhtml" media-type="application/xhtml+xml"/>'
+                    '<item id="c1" href="cap%201.xhtml" media-type="application/xhtml+xml"/>'
+                    '</manifest><spine><itemref idref="nav"/><itemref idref="cub" linear="no"/>'
+                    '<itemref idref="c1"/></spine></package>')
+        zf.writestr("OEBPS/nav.xhtml", "<html><body><nav>Índice</nav></body></html>")
+        zf.writestr("OEBPS/cubierta.xhtml", "<html><body><p>Cubierta</p></body></html>")
+        zf.writestr("OEBPS/cap 1.xhtml", "<html><body><p>Uno</p><script>x()</script></body></html>")
+
+    documentos = list(iter_epub_documentos(str(filename)))
+    assert [href for href, _ in documentos] == ["OEBPS/cap 1.xhtml"]
+    assert extraer_texto_html(documentos[0][1]) == "Uno"
+
 if __name__ == "__main__":
     # Probar con el primer EPUB disponible
     epub_files = [f for f in os.listdir('.') if f.endswith('.epub')]
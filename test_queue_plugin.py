@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import uuid
+import asyncio
+import sqlite3
+from types import SimpleNamespace
+
+import main
+from plugins import queue_plugin as queue_module
+from plugins.queue_plugin import QueuePlugin
+
+def _plugin(tmp_path):
+    """Plugin de cola con su base de datos en un directorio temporal"""
+    plugin = QueuePlugin()
+    plugin.db_path = str(tmp_path / "queue.db")
+    plugin.queue_file = str(tmp_path / "translation_queue.json")
+    return plugin
+
+def test_orden_por_prioridad_y_antiguedad(tmp_path):
+    plugin = _plugin(tmp_path)
+    normal_1 = plugin.add_to_queue(1, "a.epub", 1000, priority=2)
+    urgente = plugin.add_to_queue(2, "b.epub", 1000, priority=4)
+    normal_2 = plugin.add_to_queue(1, "c.epub", 1000, priority=2)
+    baja = plugin.add_to_queue(3, "d.epub", 1000, priority=1)
+
+    orden = []
+    while (item := plugin._pop_pending()) is not None:
+        orden.append(item.id)
+    assert orden == [urgente, normal_1, normal_2, baja]
+
+def test_ids_uuid7(tmp_path):
+    plugin = _plugin(tmp_path)
+    for i in range(3):
+        item_id = uuid.UUID(plugin.add_to_queue(1, f"{i}.epub", 10))
+        assert item_id.version == 7
+        assert item_id.variant == uuid.RFC_4122
+
+def test_cancelar(tmp_path):
+    plugin = _plugin(tmp_path)
+    primero = plugin.add_to_queue(1, "a.epub", 1000)
+    segundo = plugin.add_to_queue(1, "b.epub", 1000)
+
+    assert not plugin.cancel_item(primero, user_id=99)  # Solo el dueño puede cancelar
+    assert plugin.cancel_item(primero, user_id=1)
+    assert not plugin.cancel_item(primero, user_id=1)  # Ya no está en cola
+
+    # La entrada cancelada se descarta del heap al sacarla
+    assert plugin._pop_pending().id == segundo
+    assert plugin._pop_pending() is None
+
+def test_conteos_por_estado(tmp_path):
+    plugin = _plugin(tmp_path)
+    a = plugin.add_to_queue(1, "a.epub", 1000)
+    b = plugin.add_to_queue(1, "b.epub", 1000)
+    plugin.add_to_queue(2, "c.epub", 1000)
+    plugin.cancel_item(b, 1)
+    plugin._set_status(plugin.queue[a], 'completed')
+
+    total = plugin.get_queue_status()
+    assert (total['total_queued'], total['total_completed']) == (1, 1)
+    assert len(total['items']) == 3
+
+    usuario = plugin.get_queue_status(1)
+    assert (usuario['total_queued'], usuario['total_completed']) == (0, 1)
+    assert [item['id'] for item in usuario['items']] == [a, b]
+    assert isinstance(usuario['items'][0]['created_at'], str)  # Fechas en ISO
+
+def test_recargar_desde_sqlite(tmp_path):
+    plugin = _plugin(tmp_path)
+    a = plugin.add_to_queue(1, "a.epub", 1000, priority=1)
+    b = plugin.add_to_queue(2, "b.epub", 2000, priority=3)
+    c = plugin.add_to_queue(2, "c.epub", 3000)
+    plugin.cancel_item(c, 2)
+    plugin.progress_callback(b, 0.5)
+    plugin._flush_queue()
+
+    recargado = _plugin(tmp_path)
+    recargado.load_queue()
+    assert list(recargado.queue) == [a, b, c]
+    assert recargado.queue[b].progress == 0.5
+    assert recargado.queue[c].status == 'cancelled'
+    assert recargado.queue[a].created_at == plugin.queue[a].created_at
+    assert recargado.get_queue_status(2)['total_queued'] == 1
+    assert recargado._pop_pending().id == b
+    assert recargado._pop_pending().id == a
+    assert recargado._pop_pending() is None
+
+def test_archivo_de_salida_usa_nombre_original(tmp_path, monkeypatch):
+    """El EPUB generado se nombra con el archivo original, no con la ruta temporal"""
+    monkeypatch.chdir(tmp_path)
+    fake_main = SimpleNamespace(
+        extraer_capitulos=lambda path: [("Capítulo", "Hola mundo")],
+        detectar_idioma_seguro=lambda texto: 'es',
+        get_user_setting=lambda user_id, setting, default=True: default,
+        reemplazar_comillas=main.reemplazar_comillas,
+        crear_archivo_salida=main.crear_archivo_salida,
+    )
+    monkeypatch.setattr(queue_module, "_get_main", lambda: fake_main)
+
+    plugin = _plugin(tmp_path)
+    temporal = tmp_path / "tmpa1b2c3.epub"
+    temporal.write_bytes(b"")
+    item_id = plugin.add_to_queue(1, str(temporal), 10, file_name="Mi libro.epub")
+    item = plugin.queue[item_id]
+    asyncio.run(plugin.process_item(item))
+
+    assert item.status == 'completed', item.error_msg
+    assert item.result_path == "Mi libro_traducido.epub"
+    assert (tmp_path / "Mi libro_traducido.epub").exists()
+
+def test_migra_base_sin_file_name(tmp_path):
+    """Una base creada con el esquema anterior recibe la columna file_name"""
+    db_path = tmp_path / "queue.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE jobs (id TEXT PRIMARY KEY, user_id INTEGER NOT NULL, "
+                 "file_path TEXT NOT NULL, file_size INTEGER NOT NULL, priority INTEGER NOT NULL, "
+                 "status TEXT NOT NULL, created_at REAL NOT NULL, started_at REAL, completed_at REAL, "
+                 "progress REAL NOT NULL DEFAULT 0, result_path TEXT, error_msg TEXT, estimated_time INTEGER)")
+    conn.execute("INSERT INTO jobs (id, user_id, file_path, file_size, priority, status, created_at) "
+                 "VALUES ('x', 1, 'temp/tmp1.epub', 10, 2, 'queued', 1.0)")
+    conn.commit()
+    conn.close()
+
+    plugin = _plugin(tmp_path)
+    plugin.load_queue()
+    assert plugin.queue['x'].file_name is None
+    nuevo = plugin.add_to_queue(1, "temp/tmp2.epub", 10, file_name="Libro.epub")
+
+    recargado = _plugin(tmp_path)
+    recargado.load_queue()
+    assert recargado.queue[nuevo].file_name == "Libro.epub"
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import threading
+
+import deep_translator
+
+from plugins.streaming_plugin import StreamingPlugin
+
+class TraductorFalso:
+    """GoogleTranslator de prueba: cuenta instancias y devuelve el texto en mayúsculas"""
+    instancias = 0
+    lock = threading.Lock()
+
+    def __init__(self, source, target):
+        with TraductorFalso.lock:
+            TraductorFalso.instancias += 1
+
+    def translate(self, texto):
+        return texto.upper()
+
+def test_traductores_reutilizados_entre_textos(monkeypatch):
+    """Los traductores por hilo sobreviven entre llamadas (un capítulo tras otro)"""
+    monkeypatch.setattr(deep_translator, "GoogleTranslator", TraductorFalso)
+    monkeypatch.setattr(TraductorFalso, "instancias", 0)
+    plugin = StreamingPlugin()
+    plugin.translate_concurrency = 2
+
+    for capitulo in range(5):
+        texto = "".join(f"Capítulo {capitulo}, frase {i}. " for i in range(2000))
+        assert plugin.process_large_text_streaming(texto, "en", "es") == texto.upper()
+
+    # Como mucho un traductor por hilo del pool, no uno por hilo y capítulo
+    assert TraductorFalso.instancias <= plugin.translate_concurrency
+    assert plugin.get_executor() is plugin.get_executor()
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__]))
@@ -1,7 +1,23 @@
 #!/usr/bin/env python3
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import re
 import os
+import tempfile
+
+_STORY_ID_RE = re.compile(r'wattpad\.com/story/(\d+)')
+
+def _make_session():
+    """Session with keep-alive so every request reuses the connection to the API"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4,
+                          max_retries=Retry(total=2, backoff_factor=0.3))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+session = _make_session()
 
 def test_wattpad_url_extraction():
     """Test story ID extraction from various Wattpad URL formats"""
@@ -15,7 +31,7 @@ def test_wattpad_url_extraction():
 
     print("=== Testing Wattpad URL Extraction ===")
     for url in test_urls:
-        match = re.search(r'wattpad\.com/story/(\d+)', url)
+        match = _STORY_ID_RE.search(url)
         if match:
             story_id = match.group(1)
             print(f"✅ URL: {url}")
@@ -33,7 +49,7 @@ def test_api_connection():
     try:
         # Test health endpoint
         health_url = f"{WATTPAD_API_URL}/health"
-        response = requests.get(health_url, timeout=10)
+        response = session.get(health_url, timeout=10)
         print(f"Health check: {response.status_code}")
         if response.status_code == 200:
             print("✅ API is healthy")
@@ -45,19 +61,28 @@ def test_api_connection():
         download_url = f"{WATTPAD_API_URL}/api/{test_story_id}/download/epub"
         print(f"Testing download URL: {download_url}")
 
-        response = requests.get(download_url, timeout=60)
-        print(f"Download response: {response.status_code}")
+        with session.get(download_url, timeout=60, stream=True) as response:
+            print(f"Download response: {response.status_code}")
 
-        if response.status_code == 200:
-            print("✅ API download successful")
-            print(f"Response size: {len(response.content)} bytes")
-            # Check if it's a valid EPUB (starts with PK header for ZIP)
-            if response.content.startswith(b'PK'):
-                print("✅ Response appears to be a valid EPUB file")
+            if response.status_code == 200:
+                chunks = response.iter_content(chunk_size=64 * 1024)
+                # Check if it's a valid EPUB (starts with PK header for ZIP) from the first block
+                first = next(chunks, b'')
+                if not first.startswith(b'PK'):
+                    print("⚠️ Response may not be a valid EPUB file")
+                else:
+                    print("✅ Response appears to be a valid EPUB file")
+                    # Stream the rest to disk in 64KB blocks instead of buffering it in memory
+                    with tempfile.TemporaryFile() as f:
+                        f.write(first)
+                        size = len(first)
+                        for chunk in chunks:
+                            f.write(chunk)
+                            size += len(chunk)
+                    print("✅ API download successful")
+                    print(f"Response size: {size} bytes")
             else:
-                print("⚠️ Response may not be a valid EPUB file")
-        else:
-            print(f"❌ API download failed: {response.text}")
+                print(f"❌ API download failed: {response.text}")
 
     except requests.exceptions.RequestException as e:
         print(f"❌ API connection error: {e}")
@@ -75,14 +100,16 @@ def test_error_handling():
     for story_id in invalid_ids:
         try:
             download_url = f"{WATTPAD_API_URL}/api/{story_id}/download/epub"
-            response = requests.get(download_url, timeout=30)
-            print(f"ID {story_id}: Status {response.status_code}")
-            if response.status_code == 404:
+            # Only the status matters: stream=True skips downloading the body
+            with session.get(download_url, timeout=30, stream=True) as response:
+                status_code = response.status_code
+            print(f"ID {story_id}: Status {status_code}")
+            if status_code == 404:
                 print("✅ Correctly handled invalid story ID")
-            elif response.status_code == 200:
+            elif status_code == 200:
                 print("⚠️ Unexpected success for invalid ID")
             else:
-                print(f"⚠️ Unexpected status code: {response.status_code}")
+                print(f"⚠️ Unexpected status code: {status_code}")
         except Exception as e:
             print(f"❌ Error testing ID {story_id}: {e}")
     print()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import json
+import queue
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+import main
+import web_admin
+
+def test_ban_se_aplica(monkeypatch):
+    """El cambio encolado llega a main.user_settings y se guarda una vez por lote"""
+    guardados = []
+    monkeypatch.setattr(main, "save_persistent_data", lambda: guardados.append(True))
+    monkeypatch.setitem(main.user_settings, 5, {})
+
+    web_admin._queue_user_setting(5, 'banned', True)
+    web_admin._settings_queue.join()  # Esperar a que el escritor aplique el lote
+
+    assert main.user_settings[5]['banned'] is True
+    assert guardados
+
+def test_sin_escritor_no_se_encola(monkeypatch):
+    """Si main no se puede importar, el cambio falla en vez de perderse en silencio"""
+    monkeypatch.setattr(web_admin, "_settings_writer", None)
+    monkeypatch.setitem(sys.modules, "main", None)  # import main -> ImportError
+    pendientes = web_admin._settings_queue.qsize()
+
+    with pytest.raises(ImportError):
+        web_admin._queue_user_setting(6, 'banned', True)
+    assert web_admin._settings_queue.qsize() == pendientes
+
+def test_cola_llena(monkeypatch):
+    """Con la cola llena, _queue_user_setting lanza queue.Full (la ruta responde 503)"""
+    monkeypatch.setattr(web_admin, "_settings_writer", SimpleNamespace(is_alive=lambda: True))
+    monkeypatch.setattr(web_admin, "_settings_queue", queue.Queue(maxsize=1))
+    monkeypatch.setattr(web_admin, "SETTINGS_PUT_TIMEOUT", 0.01)
+
+    web_admin._queue_user_setting(7, 'banned', True)
+    with pytest.raises(queue.Full):
+        web_admin._queue_user_setting(7, 'banned', False)
+
+# ----------------- Logs -----------------
+def test_log_re_formato_de_main():
+    """_LOG_RE separa los campos del formato de logs/bot.log (funcName:lineno opcional)"""
+    linea = "2026-10-16 01:49:25,123 - __main__ - ERROR - procesar_epub:120 - Falló x - y"
+    m = web_admin._LOG_RE.match(linea)
+    assert m.groupdict() == {'timestamp': '2026-10-16 01:49:25,123', 'module': '__main__',
+                             'level': 'ERROR', 'message': 'Falló x - y'}
+
+    m = web_admin._LOG_RE.match("2026-10-16 01:49:25,123 - plugins.queue - INFO - hola")
+    assert (m['module'], m['level'], m['message']) == ('plugins.queue', 'INFO', 'hola')
+
+def test_recent_logs_unknown_y_orden(tmp_path, monkeypatch):
+    """Las líneas que no siguen el formato quedan como UNKNOWN; las más recientes primero"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "bot.log").write_text(
+        "2026-10-16 10:00:00,000 - __main__ - INFO - main:1 - inicio\n"
+        "Traceback (most recent call last):\n"
+        "2026-10-16 10:00:01,000 - __main__ - ERROR - main:2 - fallo\n", encoding="utf-8")
+
+    logs = web_admin.get_recent_logs()
+    assert [entry.level for entry in logs] == ['ERROR', 'UNKNOWN', 'INFO']
+    assert logs[1] == web_admin.LogEntry('N/A', 'N/A', 'UNKNOWN', 'Traceback (most recent call last):')
+    assert logs[0].message == 'fallo'
+
+def test_tail(tmp_path):
+    """_tail devuelve las últimas n líneas aunque crucen varios bloques"""
+    path = tmp_path / "bot.log"
+    lineas = [f"línea {i}" for i in range(500)]
+    path.write_text("\n".join(lineas) + "\n", encoding="utf-8")
+
+    assert web_admin._tail(str(path), 100, block=64) == lineas[-100:]
+    assert web_admin._tail(str(path), 1000, block=64) == lineas  # Archivo más corto que n
+    vacio = tmp_path / "vacio.log"
+    vacio.write_bytes(b"")
+    assert web_admin._tail(str(vacio)) == []
+
+# ----------------- Historial -----------------
+def test_summarize_historial(tmp_path, monkeypatch):
+    """Total, traducciones por día y usuarios únicos por día; el resumen se guarda en disco"""
+    monkeypatch.setattr(web_admin, "SUMMARY_PATH", str(tmp_path / "historial_summary.json"))
+    monkeypatch.setattr(web_admin, "_historial_summary", None)
+    path = tmp_path / "historial.json"
+    numerico = datetime(2026, 10, 15, 23, 30).timestamp()  # Hora local
+    path.write_text(json.dumps({
+        "1": [["a", "2026-10-16T10:00:00"], ["b", numerico]],
+        "2": [["c", "2026-10-16T11:00:00"], ["d", "2026-10-16T12:00:00"]],
+    }))
+
+    summary = web_admin._summarize_historial(str(path))
+    assert summary['total'] == 4
+    assert summary['daily_counts'] == {'2026-10-16': 3, '2026-10-15': 1}
+    assert summary['active_users'] == {'2026-10-16': 2, '2026-10-15': 1}
+
+    # Otro proceso (sin caché en memoria) reutiliza el resumen guardado
+    monkeypatch.setattr(web_admin, "_historial_summary", None)
+    monkeypatch.setattr(web_admin, "_iter_historial", lambda p: pytest.fail("no debe recorrer"))
+    assert web_admin._summarize_historial(str(path)) == summary
+
+def test_summarize_historial_ignora_entradas_invalidas(tmp_path, monkeypatch):
+    """Entradas con forma de dict o sin fecha válida no cuentan ni aparecen en el gráfico"""
+    monkeypatch.setattr(web_admin, "SUMMARY_PATH", str(tmp_path / "historial_summary.json"))
+    monkeypatch.setattr(web_admin, "_historial_summary", None)
+    path = tmp_path / "historial.json"
+    path.write_text(json.dumps({
+        "1": [{"titulo": "Historia de Wattpad", "link": "https://www.wattpad.com/story/1"},
+              {"titulo": "Otra", "link": "https://example.com"}],
+        "2": [["a", "link"], ["b", "2026-13-45T00:00"], ["c", None], ["d", True],
+              ["e", "2026-10-16", "extra"], "texto", ["f", "2026-10-16T09:00:00"]],
+        "3": {"no": "es una lista"},
+    }))
+
+    summary = web_admin._summarize_historial(str(path))
+    assert summary['total'] == 1
+    assert summary['daily_counts'] == {'2026-10-16': 1}
+    assert summary['active_users'] == {'2026-10-16': 1}
+
+    assert web_admin._last_active([{"titulo": "x", "link": "y"}]) == 'N/A'
+    assert web_admin._last_active([["x", "link"]]) == 'N/A'
+
+def test_charts_sin_datos_validos(tmp_path, monkeypatch):
+    """Con solo entradas {titulo, link} el dashboard no muestra gráfico ni traducciones"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(web_admin, "SUMMARY_PATH", str(tmp_path / "historial_summary.json"))
+    monkeypatch.setattr(web_admin, "_historial_summary", None)
+    (tmp_path / "storage").mkdir()
+    (tmp_path / "storage" / "historial.json").write_text(json.dumps(
+        {"1": [{"titulo": "Historia", "link": "https://example.com"}] * 2}))
+
+    assert web_admin.generate_charts() == {}
+    assert web_admin.get_bot_stats()['total_translations'] == 0
+
+def test_resumenes_concurrentes(tmp_path, monkeypatch):
+    """Dos resúmenes a la vez nunca dejan historial_summary.json ausente ni truncado"""
+    summary_path = tmp_path / "historial_summary.json"
+    monkeypatch.setattr(web_admin, "SUMMARY_PATH", str(summary_path))
+    resumen = {'mtime': 1, 'version': web_admin.SUMMARY_VERSION, 'total': 5000,
+               'daily_counts': {f"2026-01-{d:02d}": d for d in range(1, 29)} | {'x' * 10000: 1},
+               'active_users': {}}
+    errores = []
+    lecturas = []
+
+    def escribir():
+        try:
+            for _ in range(50):
+                web_admin._write_summary(resumen)
+        except Exception as e:
+            errores.append(e)
+
+    hilos = [threading.Thread(target=escribir) for _ in range(2)]
+    for hilo in hilos:
+        hilo.start()
+    while any(hilo.is_alive() for hilo in hilos):
+        if summary_path.exists():
+            lecturas.append(json.loads(summary_path.read_bytes()))
+    for hilo in hilos:
+        hilo.join()
+
+    assert errores == []
+    assert all(lectura == resumen for lectura in lecturas)
+    assert json.loads(summary_path.read_bytes()) == resumen
+    assert [p.name for p in tmp_path.iterdir()] == ["historial_summary.json"]
+
+# ----------------- Gráficos -----------------
+def test_refresh_charts_concurrente(tmp_path, monkeypatch):
+    """Varios hilos regenerando a la vez dejan siempre un charts.json completo y sin temporales"""
+    monkeypatch.setattr(web_admin, "CHARTS_PATH", str(tmp_path / "charts.json"))
+    monkeypatch.setattr(web_admin, "generate_charts",
+                        lambda: {'translations_chart': {'labels': ['2026-10-16'] * 500, 'values': [1] * 500}})
+    errores = []
+
+    def refrescar():
+        try:
+            for _ in range(20):
+                web_admin._refresh_charts()
+        except Exception as e:
+            errores.append(e)
+
+    hilos = [threading.Thread(target=refrescar) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert errores == []
+    assert len(json.loads((tmp_path / "charts.json").read_bytes())['translations_chart']['values']) == 500
+    assert [p.name for p in tmp_path.iterdir()] == ["charts.json"]
+
+def test_refresher_una_vez_por_proceso(monkeypatch):
+    """create_app puede llamarse varias veces sin lanzar más hilos de gráficos"""
+    parar = threading.Event()
+    monkeypatch.setattr(web_admin, "_charts_worker", parar.wait)
+    monkeypatch.setattr(web_admin, "_charts_thread", None)
+
+    web_admin.start_charts_refresher()
+    hilo = web_admin._charts_thread
+    web_admin.start_charts_refresher()
+    assert web_admin._charts_thread is hilo and hilo.is_alive()
+
+    parar.set()
+    hilo.join()
+    web_admin.start_charts_refresher()  # Un hilo muerto (p. ej. tras un fork) se reemplaza
+    assert web_admin._charts_thread is not hilo
+    parar.set()
+
+# ----------------- Decoradores de rutas -----------------
+def test_safe_api_registra_traza(caplog):
+    """safe_api responde 500 con el error y deja la traza completa en el log"""
+    flask = pytest.importorskip("flask")
+    app = flask.Flask(__name__)
+
+    @web_admin.safe_api
+    def falla():
+        raise ValueError("roto")
+
+    with app.test_request_context(), caplog.at_level("ERROR"):
+        respuesta, estado = falla()
+    assert estado == 500 and respuesta.get_json() == {'error': 'roto'}
+    assert caplog.records[-1].exc_info is not None
+
+def test_error_no_queda_en_cache(tmp_path, monkeypatch):
+    """Una vista cacheada que falla no deja la página de error en caché"""
+    pytest.importorskip("flask")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(web_admin, "start_charts_refresher", lambda: None)
+    monkeypatch.setattr(web_admin, "get_bot_stats", lambda: {})
+    llamadas = []
+
+    def charts_que_fallan_una_vez():
+        llamadas.append(True)
+        if len(llamadas) == 1:
+            raise RuntimeError("fallo temporal")
+        return {}
+    monkeypatch.setattr(web_admin, "load_charts", charts_que_fallan_una_vez)
+
+    app = web_admin.create_app()
+    # error.html no está entre las plantillas del repo: una mínima para la prueba
+    from jinja2 import ChoiceLoader, DictLoader
+    app.jinja_loader = ChoiceLoader([DictLoader({'error.html': '{{ error }}'}), app.jinja_loader])
+    client = app.test_client()
+    assert b"fallo temporal" in client.get('/').data
+    assert b"fallo temporal" not in client.get('/').data
+    assert len(llamadas) == 2
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
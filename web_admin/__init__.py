@@ -1,119 +1,393 @@
 """
 Interfaz web de administración para el bot
 """
-try:
-    from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
-    from flask_cors import CORS
-    import matplotlib.pyplot as plt
-    import seaborn as sns
-    import pandas as pd
-    from io import BytesIO
-    import base64
-    FLASK_AVAILABLE = True
-except ImportError:
-    FLASK_AVAILABLE = False
+from importlib.util import find_spec
+
+# Solo se comprueba que Flask esté instalado; los imports reales se hacen en create_app()
+FLASK_AVAILABLE = find_spec('flask') is not None
+if not FLASK_AVAILABLE:
     print("Flask no disponible, web admin deshabilitado")
 
 import os
-import json
+import re
+import functools
 import logging
-from datetime import datetime, timedelta
+import time
+import hashlib
+import tempfile
+import threading
+import queue
+from collections import Counter
+from typing import NamedTuple
+from datetime import date, datetime, timedelta
+
+# orjson es bastante más rápido que json y lee bytes directamente; json queda de respaldo
+try:
+    from orjson import loads as _loads, dumps as _dumps
+except ImportError:
+    import json
+    _loads = json.loads
+
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+
+# ijson permite recorrer historial.json sin cargarlo entero en memoria
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 logger = logging.getLogger(__name__)
 
+def _cache_config():
+    """Configuración de Flask-Caching según el entorno"""
+    redis_url = os.environ.get('REDIS_URL', '').strip()
+    if redis_url.startswith(('redis://', 'rediss://', 'unix://')):
+        return {'CACHE_TYPE': 'RedisCache', 'CACHE_REDIS_URL': redis_url, 'CACHE_DEFAULT_TIMEOUT': 10}
+    return {'CACHE_TYPE': 'SimpleCache', 'CACHE_DEFAULT_TIMEOUT': 10}
+
+# Caché de vistas (Flask-Caching), creada en create_app() si está instalado
+cache = None
+
+def _cached(timeout):
+    """Decorador de caché de vista; no hace nada si Flask-Caching no está instalado"""
+    if cache is None:
+        return lambda view: view
+    return cache.cached(timeout=timeout)
+
+# Caché de archivos JSON: ruta -> (st_mtime_ns, datos); se relee solo si el archivo cambió
+_JSON_CACHE = {}
+
+def _load_json_cached(path):
+    """Cargar un archivo JSON reutilizando el resultado mientras no cambie en disco"""
+    mtime = os.stat(path).st_mtime_ns
+    cached = _JSON_CACHE.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'rb') as f:
+        data = _loads(f.read())
+    _JSON_CACHE[path] = (mtime, data)
+    return data
+
+def safe_view(view):
+    """Mostrar error.html si la vista lanza una excepción (con traza en el log)"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            return view(*args, **kwargs)
+        except Exception as e:
+            logger.exception(f"Error en {view.__name__}")
+            from flask import render_template
+            return render_template('error.html', error=str(e))
+    return wrapper
+
+def safe_api(view):
+    """Responder {'error': ...} con estado 500 si el endpoint lanza una excepción (con traza en el log)"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            return view(*args, **kwargs)
+        except Exception as e:
+            logger.exception(f"Error en {view.__name__}")
+            from flask import jsonify
+            return jsonify({'error': str(e)}), 500
+    return wrapper
+
 def create_app():
+    global cache
     if not FLASK_AVAILABLE:
         return None
+    from flask import Flask, render_template, request, jsonify, send_file
+
     app = Flask(__name__)
-    CORS(app)
+    # CORS es opcional: sin flask_cors el panel funciona igual (solo mismo origen)
+    if find_spec('flask_cors'):
+        from flask_cors import CORS
+        CORS(app)
     app.secret_key = os.environ.get('FLASK_SECRET_KEY', 'dev-secret-key')
+    # Plantillas compiladas guardadas en disco (directorio temporal del usuario)
+    from jinja2 import FileSystemBytecodeCache
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+    # Compresión opcional de respuestas (brotli si el cliente lo acepta, si no gzip)
+    if find_spec('flask_compress'):
+        from flask_compress import Compress
+        app.config['COMPRESS_MIMETYPES'] = ['text/html', 'application/json', 'text/css', 'application/javascript']
+        app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+        Compress(app)
+    # Caché de vistas opcional: Redis si REDIS_URL está configurado, si no en memoria
+    if find_spec('flask_caching'):
+        from flask_caching import Cache
+        cache = Cache(config=_cache_config())
+        cache.init_app(app)
+    start_charts_refresher()
 
     # Configurar rutas
+    # safe_view/safe_api van por fuera de _cached: una excepción nunca llega a la caché
     @app.route('/')
+    @safe_view
+    @_cached(timeout=5)
     def dashboard():
         """Dashboard principal"""
-        try:
-            # Cargar estadísticas
-            stats = get_bot_stats()
+        # Cargar estadísticas
+        stats = get_bot_stats()
 
-            # Generar gráficos
-            charts = generate_charts()
+        # Gráficos: último snapshot generado en segundo plano
+        charts = load_charts()
 
-            return render_template('dashboard.html',
-                                 stats=stats,
-                                 charts=charts,
-                                 active_page='dashboard')
-        except Exception as e:
-            logger.error(f"Error en dashboard: {e}")
-            return render_template('error.html', error=str(e))
+        return render_template('dashboard.html',
+                             stats=stats,
+                             charts=charts,
+                             active_page='dashboard')
 
     @app.route('/users')
+    @safe_view
     def users():
         """Gestión de usuarios"""
-        try:
-            user_data = get_user_data()
-            return render_template('users.html',
-                                 users=user_data,
-                                 active_page='users')
-        except Exception as e:
-            logger.error(f"Error en users: {e}")
-            return render_template('error.html', error=str(e))
+        user_data = get_user_data()
+        return render_template('users.html',
+                             users=user_data,
+                             active_page='users')
 
     @app.route('/logs')
+    @safe_view
+    @_cached(timeout=5)
     def logs():
         """Visualización de logs"""
-        try:
-            log_entries = get_recent_logs()
-            return render_template('logs.html',
-                                 logs=log_entries,
-                                 active_page='logs')
-        except Exception as e:
-            logger.error(f"Error en logs: {e}")
-            return render_template('error.html', error=str(e))
+        log_entries = get_recent_logs()
+        return render_template('logs.html',
+                             logs=log_entries,
+                             active_page='logs')
 
     @app.route('/settings')
+    @safe_view
     def settings():
         """Configuración del bot"""
-        try:
-            bot_settings = get_bot_settings()
-            return render_template('settings.html',
-                                 settings=bot_settings,
-                                 active_page='settings')
-        except Exception as e:
-            logger.error(f"Error en settings: {e}")
-            return render_template('error.html', error=str(e))
+        bot_settings = get_bot_settings()
+        return render_template('settings.html',
+                             settings=bot_settings,
+                             active_page='settings')
 
     @app.route('/api/stats')
+    @safe_api
     def api_stats():
         """API para estadísticas"""
-        try:
-            stats = get_bot_stats()
-            return jsonify(stats)
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
+        body, etag = _stats_payload()
+        resp = app.response_class(body, mimetype='application/json')
+        resp.set_etag(etag)
+        resp.headers['Cache-Control'] = f'max-age={STATS_TTL}'
+        # 304 sin cuerpo si el cliente ya tiene esta versión (If-None-Match)
+        return resp.make_conditional(request)
+
+    @app.route('/api/charts')
+    @safe_api
+    def api_charts():
+        """API para los datos de los gráficos (snapshot en disco)"""
+        if not os.path.exists(CHARTS_PATH):
+            _refresh_charts()
+        # send_file usa sendfile y responde 304 con If-None-Match / If-Modified-Since
+        return send_file(os.path.abspath(CHARTS_PATH), mimetype='application/json',
+                         conditional=True, max_age=CHARTS_REFRESH)
 
     @app.route('/api/users/<int:user_id>/ban', methods=['POST'])
+    @safe_api
     def ban_user(user_id):
         """API para banear usuario"""
         try:
-            from main import set_user_setting
-            set_user_setting(user_id, 'banned', True)
-            return jsonify({'success': True})
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
+            _queue_user_setting(user_id, 'banned', True)
+        except queue.Full:
+            return jsonify({'error': 'Demasiados cambios pendientes, intenta de nuevo'}), 503
+        _invalidate_views()
+        return jsonify({'success': True})
 
     @app.route('/api/users/<int:user_id>/unban', methods=['POST'])
+    @safe_api
     def unban_user(user_id):
         """API para desbanear usuario"""
         try:
-            from main import set_user_setting
-            set_user_setting(user_id, 'banned', False)
-            return jsonify({'success': True})
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
+            _queue_user_setting(user_id, 'banned', False)
+        except queue.Full:
+            return jsonify({'error': 'Demasiados cambios pendientes, intenta de nuevo'}), 503
+        _invalidate_views()
+        return jsonify({'success': True})
+
+    def _invalidate_views():
+        """Descartar las vistas cacheadas tras modificar datos de usuarios"""
+        _stats_snapshot['at'] = 0.0
+        if cache is not None:
+            cache.delete('view//')
 
     return app
 
+_ISO_DAY_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+def _entry_timestamp(entry):
+    """Timestamp de una entrada [titulo, timestamp] del historial, o None si no es válida"""
+    if not isinstance(entry, (list, tuple)) or len(entry) != 2:
+        return None
+    timestamp = entry[1]
+    if isinstance(timestamp, str):
+        if not _ISO_DAY_RE.match(timestamp):
+            return None
+        try:
+            date.fromisoformat(timestamp[:10])
+        except ValueError:
+            return None
+        return timestamp
+    if isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+        return timestamp
+    return None
+
+def _iter_historial(path):
+    """Recorrer el historial como pares (user_id, timestamp) sin materializar el archivo"""
+    if ijson is None:
+        users = _load_json_cached(path).items()
+        for user_id, books in users:
+            yield from _valid_entries(user_id, books)
+        return
+    with open(path, 'rb') as f:
+        for user_id, books in ijson.kvitems(f, '', use_float=True):
+            yield from _valid_entries(user_id, books)
+
+def _valid_entries(user_id, books):
+    """Pares (user_id, timestamp) de las entradas con fecha válida; el resto se ignora"""
+    if not isinstance(books, list):
+        return
+    for entry in books:
+        timestamp = _entry_timestamp(entry)
+        if timestamp is not None:
+            yield user_id, timestamp
+
+# Cambios de configuración pendientes; un hilo escritor los aplica por lotes
+SETTINGS_BATCH = 100
+SETTINGS_PUT_TIMEOUT = 1  # segundos esperando hueco en la cola antes de responder 503
+_settings_queue = queue.Queue(maxsize=1000)
+_settings_writer = None
+_settings_writer_lock = threading.Lock()
+
+def _settings_writer_loop(set_user_settings):
+    """Aplicar los cambios encolados agrupándolos en una sola escritura por lote"""
+    while True:
+        cambios = [_settings_queue.get()]
+        while len(cambios) < SETTINGS_BATCH:
+            try:
+                cambios.append(_settings_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            set_user_settings(cambios)
+        except Exception as e:
+            logger.error(f"Error guardando configuración de usuarios: {e}")
+        finally:
+            for _ in cambios:
+                _settings_queue.task_done()
+
+def _start_settings_writer():
+    """Iniciar el hilo escritor si no está en marcha; lanza la excepción si main no se puede importar"""
+    global _settings_writer
+    with _settings_writer_lock:
+        if _settings_writer is not None and _settings_writer.is_alive():
+            return
+        # Import pesado, pero una sola vez; si falla, la petición lo recibe como error
+        from main import set_user_settings
+        _settings_writer = threading.Thread(target=_settings_writer_loop, args=(set_user_settings,),
+                                            daemon=True)
+        _settings_writer.start()
+
+def _queue_user_setting(user_id, setting, value):
+    """Encolar un cambio de configuración; queue.Full si la cola sigue llena tras la espera"""
+    _start_settings_writer()
+    _settings_queue.put((user_id, setting, value), timeout=SETTINGS_PUT_TIMEOUT)
+
+# Resumen compacto del historial: (st_mtime_ns del archivo, resumen). También se guarda en
+# SUMMARY_PATH para que otros procesos y reinicios no tengan que recorrer el historial
+SUMMARY_PATH = 'storage/historial_summary.json'
+SUMMARY_VERSION = 2  # Subir al cambiar cómo se calcula: descarta resúmenes guardados antes
+_historial_summary = None
+
+def _write_summary(summary):
+    """Guardar el resumen en SUMMARY_PATH con un reemplazo atómico (temporal único por escritura)"""
+    _atomic_write(SUMMARY_PATH, _dumps(summary))
+
+def _summarize_historial(path='storage/historial.json'):
+    """Agregar el historial: total, traducciones por día y usuarios activos por día"""
+    global _historial_summary
+    mtime = os.stat(path).st_mtime_ns
+    if _historial_summary and _historial_summary[0] == mtime:
+        return _historial_summary[1]
+
+    # Resumen en disco todavía válido para esta versión del historial
+    try:
+        summary = _load_json_cached(SUMMARY_PATH)
+        if summary.get('mtime') == mtime and summary.get('version') == SUMMARY_VERSION:
+            _historial_summary = (mtime, summary)
+            return summary
+    except (OSError, ValueError):
+        pass
+
+    total = 0
+    daily_counts = Counter()
+    day_users = {}
+    # Límites [inicio, fin) del último día local calculado: los timestamps numéricos del
+    # mismo día se resuelven con una comparación en vez de construir un datetime
+    day_start = day_end = 0.0
+    numeric_day = None
+    for user_id, timestamp in _iter_historial(path):
+        if isinstance(timestamp, str):
+            # ISO 'YYYY-MM-DD...': la fecha son los 10 primeros caracteres
+            day = timestamp[:10]
+        else:
+            if not day_start <= timestamp < day_end:
+                start = datetime.combine(datetime.fromtimestamp(timestamp).date(), datetime.min.time())
+                day_start = start.timestamp()
+                day_end = (start + timedelta(days=1)).timestamp()
+                numeric_day = start.date().isoformat()
+            day = numeric_day
+        total += 1
+        daily_counts[day] += 1
+        day_users.setdefault(day, set()).add(user_id)
+
+    # Solo se guardan conteos: el dashboard no necesita los IDs de usuario
+    summary = {
+        'mtime': mtime,
+        'version': SUMMARY_VERSION,
+        'total': total,
+        'daily_counts': dict(daily_counts),
+        'active_users': {day: len(users) for day, users in day_users.items()}
+    }
+    try:
+        _write_summary(summary)
+    except OSError as e:
+        logger.error(f"Error guardando resumen del historial: {e}")
+    # El resumen se reutiliza mientras historial.json no cambie en disco
+    _historial_summary = (mtime, summary)
+    return summary
+
+# Conteo de EPUBs traducidos: [momento del conteo, total], válido EPUB_COUNT_TTL segundos
+EPUB_COUNT_TTL = 10
+_epub_cache = [0.0, 0]
+
+def _epub_count():
+    """Contar los EPUB traducidos en el directorio actual (con caché de corta duración)"""
+    now = time.monotonic()
+    if _epub_cache[0] and now - _epub_cache[0] < EPUB_COUNT_TTL:
+        return _epub_cache[1]
+    with os.scandir('.') as entries:
+        count = sum(1 for e in entries if e.name.endswith('_traducido.epub') and e.is_file())
+    _epub_cache[:] = [now, count]
+    return count
+
+# Última respuesta de /api/stats ya serializada, con su ETag
+STATS_TTL = 5
+_stats_snapshot = {'at': 0.0, 'body': b'', 'etag': ''}
+
+def _stats_payload():
+    """Estadísticas serializadas y su ETag, recalculadas como mucho cada STATS_TTL segundos"""
+    now = time.monotonic()
+    if not _stats_snapshot['at'] or now - _stats_snapshot['at'] >= STATS_TTL:
+        body = _dumps(get_bot_stats())
+        _stats_snapshot.update(at=now, body=body, etag=hashlib.blake2b(body, digest_size=8).hexdigest())
+    return _stats_snapshot['body'], _stats_snapshot['etag']
+
 def get_bot_stats():
     """Obtener estadísticas del bot"""
     try:
@@ -128,32 +402,18 @@ def get_bot_stats():
 
         # Cargar datos de usuarios
         if os.path.exists('storage/user_settings.json'):
-            with open('storage/user_settings.json', 'r') as f:
-                user_settings = json.load(f)
-                stats['total_users'] = len(user_settings)
+            user_settings = _load_json_cached('storage/user_settings.json')
+            stats['total_users'] = len(user_settings)
 
-        # Cargar historial
+        # Total de traducciones y usuarios activos hoy, del resumen del historial
         if os.path.exists('storage/historial.json'):
-            with open('storage/historial.json', 'r') as f:
-                historial = json.load(f)
-                stats['total_translations'] = sum(len(books) for books in historial.values())
-
-        # Calcular usuarios activos hoy
-        today = datetime.now().date()
-        active_users = set()
-        for user_id, books in historial.items():
-            for _, timestamp in books:
-                if isinstance(timestamp, str):
-                    book_date = datetime.fromisoformat(timestamp).date()
-                else:
-                    book_date = datetime.fromtimestamp(timestamp).date()
-                if book_date == today:
-                    active_users.add(user_id)
-        stats['active_users_today'] = len(active_users)
+            summary = _summarize_historial('storage/historial.json')
+            stats['total_translations'] = summary['total']
+            today_iso = datetime.now().date().isoformat()
+            stats['active_users_today'] = summary['active_users'].get(today_iso, 0)
 
         # Contar archivos procesados
-        epub_files = len([f for f in os.listdir('.') if f.endswith('_traducido.epub')])
-        stats['total_files_processed'] = epub_files
+        stats['total_files_processed'] = _epub_count()
 
         return stats
 
@@ -161,85 +421,97 @@ def get_bot_stats():
         logger.error(f"Error obteniendo estadísticas: {e}")
         return {}
 
+def _last_active(books):
+    """Fecha de la última traducción de una lista [titulo, timestamp] del historial"""
+    timestamp = _entry_timestamp(books[-1]) if isinstance(books, list) and books else None
+    if timestamp is None:
+        return 'N/A'
+    if isinstance(timestamp, str):
+        return timestamp
+    return datetime.fromtimestamp(timestamp).isoformat()
+
 def get_user_data():
     """Obtener datos de usuarios"""
     try:
-        users = []
-        if os.path.exists('storage/user_settings.json'):
-            with open('storage/user_settings.json', 'r') as f:
-                user_settings = json.load(f)
-
-            for user_id, settings in user_settings.items():
-                user_info = {
-                    'id': user_id,
-                    'settings': settings,
-                    'last_active': 'N/A',
-                    'total_translations': 0
-                }
+        if not os.path.exists('storage/user_settings.json'):
+            return []
+        user_settings = _load_json_cached('storage/user_settings.json')
 
-                # Obtener historial del usuario
-                if os.path.exists('storage/historial.json'):
-                    with open('storage/historial.json', 'r') as f:
-                        historial = json.load(f)
-                        if str(user_id) in historial:
-                            user_books = historial[str(user_id)]
-                            user_info['total_translations'] = len(user_books)
-                            if user_books:
-                                # Última traducción
-                                last_book = user_books[-1]
-                                if isinstance(last_book[1], str):
-                                    user_info['last_active'] = last_book[1]
-                                else:
-                                    user_info['last_active'] = datetime.fromtimestamp(last_book[1]).isoformat()
-
-                users.append(user_info)
-
-        return users
+        # Historial cargado una sola vez; cada usuario se resuelve con un acceso al dict
+        historial = {}
+        if os.path.exists('storage/historial.json'):
+            historial = _load_json_cached('storage/historial.json')
+
+        return [
+            {
+                'id': user_id,
+                'settings': settings,
+                'last_active': _last_active(historial.get(str(user_id))),
+                'total_translations': len(historial.get(str(user_id), ()))
+            }
+            for user_id, settings in user_settings.items()
+        ]
 
     except Exception as e:
         logger.error(f"Error obteniendo datos de usuarios: {e}")
         return []
 
+def _tail(path, n=100, block=65536):
+    """Leer las últimas n líneas de un archivo leyendo bloques desde el final"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        buf = b''
+        while pos > 0 and buf.count(b'\n') <= n:
+            size = min(block, pos)
+            pos -= size
+            f.seek(pos)
+            buf = f.read(size) + buf
+    return [line.decode('utf-8', 'replace') for line in buf.splitlines()[-n:]]
+
+# Línea de log: 'asctime - name - levelname - funcName:lineno - message' (funcName:lineno opcional)
+_LOG_RE = re.compile(
+    r'(?P<timestamp>\S+ \S+) - (?P<module>\S+) - (?P<level>[A-Z]+) - (?:\S+:\d+ - )?(?P<message>.*)'
+)
+
+class LogEntry(NamedTuple):
+    """Entrada de log parseada (tupla ligera; en plantillas se accede como log.level)"""
+    timestamp: str
+    module: str
+    level: str
+    message: str
+
 def get_recent_logs():
     """Obtener logs recientes"""
     try:
         logs = []
         if os.path.exists('bot.log'):
-            with open('bot.log', 'r') as f:
-                lines = f.readlines()[-100:]  # Últimas 100 líneas
-                for line in lines:
-                    # Parsear línea de log
-                    try:
-                        parts = line.strip().split(' - ', 3)
-                        if len(parts) >= 4:
-                            timestamp = parts[0]
-                            level = parts[1]
-                            module = parts[2]
-                            message = parts[3]
-                            logs.append({
-                                'timestamp': timestamp,
-                                'level': level,
-                                'module': module,
-                                'message': message
-                            })
-                    except:
-                        logs.append({
-                            'timestamp': 'N/A',
-                            'level': 'UNKNOWN',
-                            'module': 'N/A',
-                            'message': line.strip()
-                        })
+            lines = _tail('bot.log', 100)  # Últimas 100 líneas
+            for line in lines:
+                # Parsear línea de log
+                m = _LOG_RE.match(line.strip())
+                if m:
+                    logs.append(LogEntry(*m.groups()))
+                else:
+                    logs.append(LogEntry('N/A', 'N/A', 'UNKNOWN', line.strip()))
         return logs[::-1]  # Más recientes primero
 
     except Exception as e:
         logger.error(f"Error obteniendo logs: {e}")
         return []
 
+# Configuración de .env ya parseada; se vuelve a leer solo si cambia su mtime
+_ENV_CACHE = {'mtime': None, 'data': {}}
+
 def get_bot_settings():
     """Obtener configuración del bot"""
     try:
-        settings = {}
-        if os.path.exists('.env'):
+        try:
+            mtime = os.stat('.env').st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        if mtime != _ENV_CACHE['mtime']:
+            settings = {}
             with open('.env', 'r') as f:
                 for line in f:
                     if '=' in line and not line.startswith('#'):
@@ -248,7 +520,8 @@ def get_bot_settings():
                         if 'key' in key.lower() or 'token' in key.lower():
                             value = '*' * len(value)
                         settings[key] = value
-        return settings
+            _ENV_CACHE.update(mtime=mtime, data=settings)
+        return dict(_ENV_CACHE['data'])
 
     except Exception as e:
         logger.error(f"Error obteniendo configuración: {e}")
@@ -261,38 +534,16 @@ def generate_charts():
 
         # Gráfico de traducciones por día
         if os.path.exists('storage/historial.json'):
-            with open('storage/historial.json', 'r') as f:
-                historial = json.load(f)
-
-            # Recopilar datos
-            dates = []
-            for user_books in historial.values():
-                for _, timestamp in user_books:
-                    if isinstance(timestamp, str):
-                        date = datetime.fromisoformat(timestamp).date()
-                    else:
-                        date = datetime.fromtimestamp(timestamp).date()
-                    dates.append(date)
-
-            if dates:
-                df = pd.DataFrame({'date': dates})
-                df['count'] = 1
-                daily_counts = df.groupby('date').count()
-
-                plt.figure(figsize=(10, 6))
-                plt.plot(daily_counts.index, daily_counts['count'])
-                plt.title('Traducciones por Día')
-                plt.xlabel('Fecha')
-                plt.ylabel('Número de Traducciones')
-                plt.xticks(rotation=45)
-
-                # Convertir a base64
-                buffer = BytesIO()
-                plt.savefig(buffer, format='png', bbox_inches='tight')
-                buffer.seek(0)
-                image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-                charts['translations_chart'] = f'data:image/png;base64,{image_base64}'
-                plt.close()
+            summary = _summarize_historial('storage/historial.json')
+            daily_counts = summary['daily_counts']
+
+            if daily_counts:
+                # Datos para Chart.js: el gráfico se dibuja en el navegador
+                days = sorted(daily_counts.items())  # Fechas ISO: orden alfabético = cronológico
+                charts['translations_chart'] = {
+                    'labels': [day for day, _ in days],
+                    'values': [count for _, count in days]
+                }
 
         return charts
 
@@ -300,10 +551,69 @@ def generate_charts():
         logger.error(f"Error generando gráficos: {e}")
         return {}
 
-# Crear aplicación Flask
-app = create_app()
+# Snapshot de gráficos regenerado en segundo plano cada CHARTS_REFRESH segundos
+CHARTS_PATH = 'storage/charts.json'
+CHARTS_REFRESH = 30
+_charts_thread = None
+_charts_thread_lock = threading.Lock()
+_charts_lock = threading.Lock()  # Una sola regeneración a la vez en este proceso
+
+def _atomic_write(path, data):
+    """Escribir data en path mediante un temporal único del mismo directorio y os.replace"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def _refresh_charts():
+    """Regenerar los gráficos y guardarlos en CHARTS_PATH con un reemplazo atómico"""
+    with _charts_lock:
+        _atomic_write(CHARTS_PATH, _dumps(generate_charts()))
+
+def _charts_worker():
+    """Bucle del hilo que mantiene actualizado el snapshot de gráficos"""
+    while True:
+        try:
+            _refresh_charts()
+        except Exception as e:
+            logger.error(f"Error actualizando gráficos: {e}")
+        time.sleep(CHARTS_REFRESH)
+
+def start_charts_refresher():
+    """Iniciar (una sola vez por proceso) el hilo que regenera los gráficos"""
+    global _charts_thread
+    with _charts_thread_lock:
+        # Tras un fork (workers de gunicorn) el hilo del padre ya no está vivo en el hijo
+        if _charts_thread is None or not _charts_thread.is_alive():
+            _charts_thread = threading.Thread(target=_charts_worker, daemon=True)
+            _charts_thread.start()
+
+def load_charts():
+    """Leer el último snapshot de gráficos; si aún no existe, generarlo en el momento"""
+    try:
+        return _load_json_cached(CHARTS_PATH)
+    except FileNotFoundError:
+        return generate_charts()
+    except Exception as e:
+        logger.error(f"Error leyendo gráficos: {e}")
+        return generate_charts()
+
+# Aplicación Flask creada al primer acceso a web_admin.app (importar el módulo no carga Flask)
+def __getattr__(name):
+    if name == 'app':
+        globals()['app'] = create_app()
+        return globals()['app']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == '__main__':
+    app = create_app()
     if app:
         app.run(debug=True, host='0.0.0.0', port=5000)
     else: